@@ -0,0 +1,25 @@
+import pytest
+
+import ztrack.tracking.pipeline as pipeline
+from ztrack.tracking.eye.multi_threshold import MultiThresholdEyeTracker
+from ztrack.tracking.tail.sequential import SequentialTailTracker
+
+
+class _EmptyFrameSource:
+    def __init__(self, video_path, **kwargs):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+@pytest.mark.parametrize("tracker_class", [MultiThresholdEyeTracker, SequentialTailTracker])
+def test_track_video_without_frames(monkeypatch, tracker_class):
+    # decord cannot open a video without frames, so the frame source is replaced
+    monkeypatch.setattr(pipeline, "FrameSource", _EmptyFrameSource)
+    tracker = tracker_class()
+
+    df = tracker.track_video("empty.avi")
+
+    assert len(df) == 0
+    assert len(df.columns) > 0
@@ -0,0 +1,36 @@
+def convert(inputs, recursive, verbose, to, overwrite):
+    import logging
+    import shutil
+    from pathlib import Path
+
+    from tqdm import tqdm
+
+    from ztrack._settings import columnar_results_extension, results_extension
+    from ztrack.results import convert_results, replace_results
+    from ztrack.utils.file import get_paths_for_view_results, get_results_path
+
+    extension = columnar_results_extension if to == "columnar" else results_extension
+    videos = get_paths_for_view_results(inputs, recursive)
+
+    for video in tqdm(videos) if verbose else videos:
+        src = get_results_path(video)
+        dst = src.with_suffix(extension)
+
+        if src == dst or (dst.exists() and not overwrite):
+            continue
+
+        # converted next to the destination and swapped in once complete
+        partial_path = Path(str(dst) + ".partial")
+
+        try:
+            convert_results(src, partial_path, to)
+        except Exception as e:
+            logging.error(f"Converting {src} failed: {e!r}")
+
+            if partial_path.is_dir():
+                shutil.rmtree(partial_path)
+            elif partial_path.exists():
+                partial_path.unlink()
+            continue
+
+        replace_results(partial_path, dst)
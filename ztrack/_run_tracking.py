@@ -1,46 +1,302 @@
+from ztrack._settings import decode_batch_size
+
+
 def run_tracking(
     inputs,
     recursive,
     overwrite,
     verbose,
     ignore_errors,
+    batch_size=decode_batch_size,
+    jobs=1,
+    frame_jobs=1,
+    resume=False,
+    results_format="hdf",
+    complib="zlib",
+    complevel=0,
+    shuffle="byte",
+    index=True,
+    force=False,
+):
+    import logging
+    import warnings
+
+    from ztrack.results.hdf import make_filters
+    from ztrack.utils.file import get_video_paths_from_inputs
+    from ztrack.utils.index import open_index
+
+    logging.basicConfig(format="%(levelname)s:%(message)s", level=logging.DEBUG)
+
+    if results_format == "hdf":
+        writer_options = dict(complib=complib, complevel=complevel, shuffle=shuffle)
+        make_filters(**writer_options)  # fail early on invalid combinations
+    else:
+        writer_options = {}
+
+    # scans and --no-overwrite checks answer from the index where it is up to date
+    experiment_index = open_index() if index else None
+    videos = get_video_paths_from_inputs(inputs, recursive, overwrite, experiment_index)
+
+    # videos that were not tracked, e.g. after an interruption, get their status back
+    unfinished = {}
+
+    def record(video, summary=None, error=None):
+        if experiment_index is None:
+            return
+
+        unfinished.pop(video, None)
+
+        if error is not None:
+            experiment_index.record(video, status="failed", error=repr(error))
+        elif summary["results_path"] is None:
+            experiment_index.record(
+                video, status="failed", error="Every tracker failed", **summary
+            )
+        else:
+            experiment_index.record(video, status="done", error=None, **summary)
+
+    for video in videos if experiment_index is not None else ():
+        row = experiment_index.get(video)
+        unfinished[video] = "configured" if row is None else row["status"]
+        experiment_index.record(video, status="running")
+
+    try:
+        if jobs <= 1 or len(videos) <= 1:
+            for video in videos:
+                try:
+                    messages, summary = track_and_save(
+                        video,
+                        ignore_errors,
+                        verbose,
+                        batch_size,
+                        frame_jobs,
+                        resume,
+                        results_format,
+                        writer_options,
+                        force,
+                    )
+                except BaseException as e:
+                    record(video, error=e)
+                    raise
+
+                record(video, summary)
+
+                for message in messages:
+                    warnings.warn(message)
+        else:
+            _track_in_parallel(
+                videos,
+                record,
+                jobs,
+                ignore_errors,
+                verbose,
+                batch_size,
+                frame_jobs,
+                resume,
+                results_format,
+                writer_options,
+                force,
+            )
+    finally:
+        if experiment_index is not None:
+            for video, status in unfinished.items():
+                experiment_index.record(video, status=status)
+
+            experiment_index.close()
+
+
+def _track_in_parallel(
+    videos,
+    record,
+    jobs,
+    ignore_errors,
+    verbose,
+    batch_size,
+    frame_jobs,
+    resume,
+    results_format,
+    writer_options,
+    force,
 ):
     import logging
     import warnings
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    from tqdm import tqdm
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(
+                track_and_save,
+                video,
+                ignore_errors,
+                0,
+                batch_size,
+                frame_jobs,
+                resume,
+                results_format,
+                writer_options,
+                force,
+            ): video
+            for video in videos
+        }
+        it = as_completed(futures)
+
+        for future in tqdm(it, total=len(futures)) if verbose else it:
+            video = futures[future]
 
-    import pandas as pd
+            try:
+                messages, summary = future.result()
+            except Exception as e:
+                logging.error(f"Tracking failed for {video}: {e!r}")
+                record(video, error=e)
+                continue
+
+            record(video, summary)
 
+            for message in messages:
+                warnings.warn(message)
+
+            if verbose:
+                logging.info(f"Finished {video}")
+
+
+def track_and_save(
+    video,
+    ignore_errors,
+    verbose,
+    batch_size=decode_batch_size,
+    frame_jobs=1,
+    resume=False,
+    results_format="hdf",
+    writer_options=None,
+    force=False,
+):
+    import logging
+    import os
+    import shutil
+    from pathlib import Path
+
+    from ztrack._settings import columnar_results_extension, results_extension
+    from ztrack.results import (
+        copy_results,
+        create_writer,
+        open_results,
+        replace_results,
+    )
     from ztrack.tracking import get_trackers_from_config
-    from ztrack.utils.exception import VideoTrackingError
+    from ztrack.tracking.pipeline import TrackingPipeline
     from ztrack.utils.file import (
+        config_hash,
         get_config_dict,
         get_results_path,
-        get_video_paths_from_inputs,
+        results_stamp,
+        video_fingerprint,
     )
 
-    logging.basicConfig(format="%(levelname)s:%(message)s", level=logging.DEBUG)
+    config = get_config_dict(video)
+    fingerprint = video_fingerprint(video)
+    stamps = {key: results_stamp(group, fingerprint) for key, group in config.items()}
 
-    videos = get_video_paths_from_inputs(inputs, recursive, overwrite)
-    for video in videos:
-        config = get_config_dict(video)
-        trackers = get_trackers_from_config(config, verbose=verbose)
+    # groups whose results were tracked with the same config, ztrack version
+    # and video are copied from the existing results instead of tracked again
+    existing_path = get_results_path(video)
+    fresh = set()
 
-        dfs = {}
+    if not force and existing_path.exists():
+        with open_results(existing_path) as reader:
+            fresh = {
+                key
+                for key, stamp in stamps.items()
+                if reader.stamps.get(key) == stamp and (key in reader or key in reader.failed)
+            }
 
-        for key, tracker in trackers.items():
+            if fresh == set(stamps) and set(reader.keys) <= fresh:
+                if verbose:
+                    logging.info(f"Results of {video} are up to date")
 
+                summary = dict(
+                    config_hash=config_hash(config),
+                    results_path=str(existing_path),
+                    trackers=reader.keys,
+                    n_frames=reader.n_frames,
+                    stamps=dict(reader.stamps),
+                )
+                return [], summary
+
+    trackers = get_trackers_from_config(
+        {key: group for key, group in config.items() if key not in fresh}, verbose=verbose
+    )
+
+    # results are committed to a partial store as tracking goes and swapped in
+    # at the end, so that a crash or a concurrent reader never sees a
+    # half-written results file, and an interrupted run can be resumed
+    extension = columnar_results_extension if results_format == "columnar" else results_extension
+    results_path = get_results_path(video, extension)
+    partial_path = Path(str(results_path) + ".partial")
+    resume = resume and partial_path.exists()
+    writer_options = writer_options or {}
+    writer = create_writer(partial_path, results_format, resume=resume, **writer_options)
+
+    if resume and writer.stamps.items() - stamps.items():
+        # the config or the video changed since the interrupted run
+        writer.close()
+        writer = create_writer(partial_path, results_format, **writer_options)
+        resume = False
+
+    errors = {}
+
+    with writer:
+        trackers = {key: t for key, t in trackers.items() if key not in writer.failed}
+        writer.stamps.update({key: stamps[key] for key in trackers})
+
+        if trackers:
             if verbose:
-                logging.info(f"Tracking {video}")
+                if resume:
+                    logging.info(f"Resuming {video} from frame {writer.n_frames}")
+                else:
+                    logging.info(f"Tracking {video}")
 
-            try:
-                dfs[key] = tracker.track_video(video, ignore_errors)
-            except VideoTrackingError as e:
-                warnings.warn(f"Tracker {key} failed for {video} at frame {e.frame}.")
+            pipeline = TrackingPipeline(
+                trackers,
+                ignore_errors=ignore_errors,
+                verbose=verbose,
+                batch_size=batch_size,
+                jobs=frame_jobs,
+            )
+            pipeline.track_video(video, writer=writer, start=writer.n_frames)
+            errors = pipeline.errors
+
+        if fresh:
+            if verbose:
+                logging.info(f"Keeping the results of {', '.join(sorted(fresh))} for {video}")
 
-        if dfs:
-            s = pd.HDFStore(get_results_path(video), complib="zlib")
+            with open_results(existing_path) as reader:
+                copy_results(reader, writer, [key for key in fresh if key in reader])
+                writer.failed.update(key for key in fresh if key in reader.failed)
+                writer.stamps.update({key: stamps[key] for key in fresh})
+                writer.commit(max(writer.n_frames, reader.n_frames))
 
-            for key, df in dfs.items():
-                s[key] = df
+        keys = writer.keys
+        n_frames = writer.n_frames
+        committed_stamps = dict(writer.stamps)
 
-            s.close()
+    messages = [
+        f"Tracker {key} failed for {video} at frame {e.frame}." for key, e in errors.items()
+    ]
+
+    if keys:
+        replace_results(partial_path, results_path)
+    elif partial_path.is_dir():
+        shutil.rmtree(partial_path)
+    else:
+        os.remove(partial_path)
+
+    summary = dict(
+        config_hash=config_hash(config),
+        results_path=str(results_path) if keys else None,
+        trackers=keys,
+        n_frames=n_frames,
+        stamps=committed_stamps,
+    )
+    return messages, summary
@@ -1,3 +1,18 @@
 video_extensions = (".avi", ".mp4")
 config_extension = ".json"
+events_extension = ".csv"
+background_override_extension = ".background.png"
 results_extension = ".h5"
+decode_batch_size = 16
+commit_interval = 10000
+cache_dir_env = "ZTRACK_CACHE_DIR"
+background_cache_size = 64
+frame_cache_size = 64
+frame_read_ahead = 8
+preview_delay_ms = 50
+preview_grid_size = 12
+columnar_results_extension = ".ztr"
+results_block_size = 1024
+results_cache_blocks = 32
+results_read_ahead = 4
+index_env = "ZTRACK_INDEX"
@@ -0,0 +1,34 @@
+def status(inputs, recursive, verbose):
+    import pandas as pd
+
+    from ztrack.utils.file import get_video_files
+    from ztrack.utils.index import ExperimentIndex
+
+    with ExperimentIndex() as index:
+        # brings the index up to date with the directories that changed
+        files = get_video_files(inputs, recursive, index)
+        rows = [index.get(file.video) or {} for file in files]
+
+    def default_status(file):
+        return "done" if file.results else "configured" if file.config else "new"
+
+    df = pd.DataFrame(
+        [
+            dict(
+                video=str(file.video),
+                status=row.get("status", default_status(file)),
+                trackers=", ".join(row.get("trackers") or []),
+                n_frames=row.get("n_frames"),
+                updated=pd.to_datetime(row["updated"], unit="s") if row else None,
+                error=row.get("error"),
+            )
+            for file, row in zip(files, rows)
+        ],
+        columns=["video", "status", "trackers", "n_frames", "updated", "error"],
+    )
+
+    print(df["status"].value_counts().to_string())
+
+    if verbose:
+        print()
+        print(df.to_string(index=False))
@@ -14,38 +14,108 @@ def view_results(
     behind,
     label,
     verbose,
+    jobs=1,
+    draw_jobs=4,
+    window=(),
+    events=False,
+    padding=(50, 50),
+    clips=False,
+    index=True,
 ):
-    from ztrack.gui.tracking_viewer import TrackingViewer
-    from ztrack.gui.utils.launch import launch
-    from ztrack.utils.file import get_paths_for_view_results
+    import logging
+    from concurrent.futures import ProcessPoolExecutor, as_completed
 
-    video_paths = [
-        str(i) for i in get_paths_for_view_results(inputs, recursive)
-    ]
+    from tqdm import tqdm
+
+    from ztrack.utils.file import get_events_path, get_paths_for_view_results
+    from ztrack.utils.index import open_index
+
+    experiment_index = open_index() if index else None
+
+    try:
+        video_paths = [
+            str(i)
+            for i in get_paths_for_view_results(
+                inputs, recursive, experiment_index
+            )
+        ]
+    finally:
+        if experiment_index is not None:
+            experiment_index.close()
+
+    if events and not gui:
+        # videos that were not annotated are skipped
+        annotated = []
+
+        for video_path in video_paths:
+            if get_events_path(video_path).exists():
+                annotated.append(video_path)
+            else:
+                logging.warning(f"Skipping {video_path}: no events")
+
+        video_paths = annotated
 
     if gui:
+        from ztrack.gui.tracking_viewer import TrackingViewer
+        from ztrack.gui.utils.launch import launch
+
         launch(
             TrackingViewer,
             videoPaths=video_paths,
             verbose=verbose,
         )
     else:
-        for video_path in video_paths:
-            generate_tracking_video(
-                video_path,
-                codec=codec,
-                fps=fps,
-                line_width=line_width,
-                frame_range=frame_range,
-                verbose=verbose,
-                format=format,
-                timer=timer,
-                egocentric=egocentric,
-                width=width,
-                front=front,
-                behind=behind,
-                label=label,
-            )
+        kwargs = dict(
+            codec=codec,
+            fps=fps,
+            line_width=line_width,
+            frame_range=frame_range,
+            format=format,
+            timer=timer,
+            egocentric=egocentric,
+            width=width,
+            front=front,
+            behind=behind,
+            label=label,
+            draw_jobs=draw_jobs,
+            windows=list(window) or None,
+            padding=padding,
+            clips=clips,
+        )
+
+        def events_path(video_path):
+            if events:
+                return str(get_events_path(video_path))
+
+        if jobs <= 1 or len(video_paths) <= 1:
+            for video_path in video_paths:
+                generate_tracking_video(
+                    video_path,
+                    events_path=events_path(video_path),
+                    verbose=verbose,
+                    **kwargs,
+                )
+            return
+
+        # videos are rendered by separate processes, each with its own pool
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(
+                    generate_tracking_video,
+                    video_path,
+                    events_path=events_path(video_path),
+                    **kwargs,
+                ): video_path
+                for video_path in video_paths
+            }
+            it = as_completed(futures)
+
+            for future in tqdm(it, total=len(futures)) if verbose else it:
+                try:
+                    future.result()
+                except Exception as e:
+                    video_path = futures[future]
+                    logging.error(f"Rendering failed for {video_path}: {e!r}")
 
 
 def generate_tracking_video(
@@ -65,149 +135,55 @@ def generate_tracking_video(
     behind,
     label,
     verbose=0,
+    draw_jobs=4,
+    windows=None,
+    events_path=None,
+    padding=(0, 0),
+    clips=False,
 ):
-    from pathlib import Path
-
-    import cv2
-    import numpy as np
-    import pandas as pd
-    from decord import VideoReader
-    from tqdm import tqdm
-
-    import ztrack.utils.cv as zcv
-
-    colors = dict(
-        left_eye=(0, 0, 255),
-        right_eye=(255, 0, 0),
-        swim_bladder=(0, 255, 0),
-        tail=(255, 0, 255),
+    from ztrack.results import open_results
+    from ztrack.utils.file import get_results_path
+    from ztrack.utils.render import (
+        Overlays,
+        event_windows,
+        merge_windows,
+        read_events,
+        render_video,
     )
-    line_type = cv2.LINE_AA
 
     if results_path is None:
-        results_path = str(video_path) + ".h5"
-        assert Path(results_path).exists()
+        results_path = get_results_path(video_path)
+        assert results_path.exists()
 
     if save_path is None:
         save_path = str(video_path) + "." + format
 
-    store = pd.HDFStore(results_path)
-
-    df_eye = None
-    df_tail = None
-
-    if "free" in store:
-        try:
-            df = store["free"]
-            df_eye = df[["left_eye", "right_eye", "swim_bladder", "heading"]]
-            tail_columns = [j for j in df.columns if "point" in j[0]]
-            df_tail = df.loc[:, tail_columns]
-        except KeyError:
-            pass
-
-    if df_eye is None and "eye" in store:
-        df_eye = store["eye"]
-    if df_tail is None and "tail" in store:
-        df_tail = store["tail"]
-
-    cap = cv2.VideoCapture(video_path)
-    fourcc = cv2.VideoWriter_fourcc(*codec)
-
-    if fps is None:
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
-
-    if df_eye is None:
-        egocentric = False
-
-    midpoints = None
-
-    if egocentric and df_eye is not None:
-        w = width
-        h = front + behind
-
-        midpoints = (
-            np.column_stack(
-                [
-                    df_eye[("left_eye", "cx")] + df_eye[("right_eye", "cx")],
-                    df_eye[("left_eye", "cy")] + df_eye[("right_eye", "cy")],
-                ]
-            )
-            / 2
-        )
-
-    else:
-        w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-    writer = cv2.VideoWriter(save_path, fourcc, fps, (w, h), True)
-
-    if frame_range is None:
-        frame_range = range(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
-    elif isinstance(frame_range, tuple):
-        frame_range = range(*frame_range)
-
-    cap.release()
-
-    if verbose:
-        frame_range = tqdm(frame_range)
-
-    vr = VideoReader(video_path)
-
-    for i in frame_range:
-        img = vr[i].asnumpy()
-
-        if label and df_eye is not None:
-            row_eye = df_eye.iloc[i]
-
-            for blob in ("left_eye", "right_eye", "swim_bladder"):
-                cx, cy, a, b, angle, *_ = row_eye[blob]
-                center = (round(cx), round(cy))
-                axes = (round(a), round(b))
-                cv2.ellipse(
-                    img,
-                    center,
-                    axes,
-                    angle,
-                    0,
-                    360,
-                    colors[blob],
-                    line_width,
-                    line_type,
-                )
-
-        if label and df_tail is not None:
-            row_tail = df_tail.iloc[i]
-
-            pts = np.round(row_tail.values.reshape(-1, 2)[:, None, :]).astype(
-                int
-            )
-            cv2.polylines(
-                img, [pts], False, colors["tail"], line_width, line_type
-            )
-
-        if egocentric and df_eye is not None and midpoints is not None:
-            row_eye = df_eye.iloc[i]
-            heading = row_eye["heading"].item()
-            img = zcv.warp_img(
-                img, midpoints[i], heading, width, front, behind
-            )
-
-        if timer:
-            t = i / fps
-            text = f"{t:.2f} s"
-            img = cv2.putText(
-                img,
-                text,
-                (64, 64),
-                cv2.FONT_HERSHEY_DUPLEX,
-                1,
-                (255, 255, 255),
-                2,
-                cv2.LINE_AA,
-                False,
-            )
-
-        writer.write(img)
-
-    writer.release()
-    store.close()
+    with open_results(results_path) as store:
+        overlays = Overlays.from_store(store)
+
+    if events_path is not None:
+        frames = read_events(events_path)["frame"]
+        windows = list(windows or []) + event_windows(frames, *padding)
+
+    if windows is not None and not clips:
+        windows = merge_windows(windows)
+
+    render_video(
+        video_path,
+        save_path,
+        overlays,
+        codec=codec,
+        fps=fps,
+        frame_range=frame_range,
+        windows=windows,
+        clips=clips,
+        jobs=draw_jobs,
+        verbose=verbose,
+        line_width=line_width,
+        label=label,
+        timer=timer,
+        egocentric=egocentric,
+        width=width,
+        front=front,
+        behind=behind,
+    )
@@ -2,6 +2,8 @@ from functools import reduce
 
 import click
 
+from ztrack._settings import decode_batch_size
+
 inputs = click.argument("inputs", nargs=-1, type=click.Path(exists=True))
 recursive = click.option(
     "-r", "--recursive", is_flag=True, help="Look for files in subdirectories."
@@ -10,6 +12,12 @@ overwrite = click.option(
     "--overwrite/--no-overwrite", default=True, show_default=True
 )
 verbose = click.option("-v", "--verbose", count=True, help="Verbosity.")
+index = click.option(
+    "--index/--no-index",
+    default=True,
+    show_default=True,
+    help="Look for videos, configs and results through the experiment index.",
+)
 common_parameters = (inputs, recursive, verbose)
 
 
@@ -51,6 +59,67 @@ def create_config(**kwargs):
     is_flag=True,
     help="Ignore errors during tracking.",
 )
+@click.option(
+    "--batch-size",
+    default=decode_batch_size,
+    show_default=True,
+    help="Number of frames to decode at a time.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    help="Number of videos to track in parallel.",
+)
+@click.option(
+    "--frame-jobs",
+    default=1,
+    show_default=True,
+    help="Number of processes tracking chunks of the same video "
+    "(only used when every tracker of the video is frame-independent).",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Continue interrupted runs from the last committed frame.",
+)
+@click.option(
+    "--results-format",
+    type=click.Choice(["hdf", "columnar"]),
+    default="hdf",
+    show_default=True,
+    help="Format of the results: an HDF5 store, or a directory of "
+    "memory-mappable column chunks.",
+)
+@click.option(
+    "--complib",
+    default="zlib",
+    show_default=True,
+    help="Compression library of the HDF5 results (e.g. zlib, blosc:lz4, "
+    "blosc:zstd).",
+)
+@click.option(
+    "--complevel",
+    type=click.IntRange(0, 9),
+    default=0,
+    show_default=True,
+    help="Compression level of the HDF5 results (0 disables compression).",
+)
+@click.option(
+    "--shuffle",
+    type=click.Choice(["none", "byte", "bit"]),
+    default="byte",
+    show_default=True,
+    help="Shuffle filter applied before compression (bit shuffle needs blosc).",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Track every tracker group again, even if its results are up to "
+    "date with the config, the video and the ztrack version.",
+)
+@index
 def run(**kwargs):
     from ztrack._run_tracking import run_tracking
 
@@ -131,6 +200,46 @@ def run(**kwargs):
     is_flag=True,
     help="Show timer in the tracking video.",
 )
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    help="Number of tracking videos to generate in parallel.",
+)
+@click.option(
+    "--draw-jobs",
+    default=4,
+    show_default=True,
+    help="Number of threads annotating the frames of each tracking video.",
+)
+@click.option(
+    "--window",
+    multiple=True,
+    type=(int, int),
+    help="Frames [START, STOP) to use for generating the tracking video "
+    "(can be repeated; overrides --frame-range).",
+)
+@click.option(
+    "--events",
+    is_flag=True,
+    help="Use the frames around the events annotated in the CSV file next to "
+    "each video (overrides --frame-range).",
+)
+@click.option(
+    "--padding",
+    default=(50, 50),
+    type=(int, int),
+    show_default=True,
+    help="Number of frames before and after each event to include.",
+)
+@click.option(
+    "--clips",
+    is_flag=True,
+    help="Save one tracking video per window or event instead of "
+    "concatenating them.",
+)
+@index
 def view(**kwargs):
     from ztrack._view_results import view_results
 
@@ -152,3 +261,27 @@ def annotate(**kwargs):
     from ztrack._annotate import annotate
 
     annotate(**kwargs)
+
+
+@main.command(short_help="Show the tracking status of videos.")
+@my_command
+def status(**kwargs):
+    from ztrack._status import status
+
+    status(**kwargs)
+
+
+@main.command(short_help="Convert results to another format.")
+@my_command
+@click.option(
+    "--to",
+    type=click.Choice(["hdf", "columnar"]),
+    default="columnar",
+    show_default=True,
+    help="Format to convert the results to.",
+)
+@overwrite
+def convert(**kwargs):
+    from ztrack._convert_results import convert
+
+    convert(**kwargs)
@@ -11,10 +11,12 @@ from ztrack.utils.file import video_extensions
 
 from ._tracking_plot_widget import TrackingPlotWidget
 from .utils.frame_bar import FrameBar
+from .utils.frame_loader import FrameLoader
 
 if TYPE_CHECKING:
     from typing import List, Optional
 
+    import numpy as np
     from PyQt5 import QtGui
 
 
@@ -39,6 +41,8 @@ class MainWindow(QtWidgets.QMainWindow):
         self._frameBar = FrameBar(self)
         self._useVideoFPS = True
         self._videoReader = None
+        self._frameLoader: Optional[FrameLoader] = None
+        self._lastFrame: Optional[np.ndarray] = None
         self._trackingPlotWidget = TrackingPlotWidget(self)
         self._hBoxLayout = QtWidgets.QHBoxLayout()
         self._hBoxLayout.setContentsMargins(0, 0, 0, 0)
@@ -93,7 +97,7 @@ class MainWindow(QtWidgets.QMainWindow):
         actionOpenFiles.triggered.connect(self._openFiles)
         actionOpenFolders.triggered.connect(self._openFolders)
         actionSetFPS.triggered.connect(self._setFPS)
-        self._frameBar.valueChanged.connect(self._onFrameChanged)
+        self._frameBar.valueChanged.connect(self._onFrameBarValueChanged)
 
         self.setMenuBar(menuBar)
         self.setWindowTitle("ztrack")
@@ -102,10 +106,35 @@ class MainWindow(QtWidgets.QMainWindow):
 
     @property
     def _currentFrame(self):
-        if self._videoReader is None:
+        # the frame at the slider if it was decoded already, otherwise the most
+        # recent frame that was, so that the UI thread never waits for the decoder
+        if self._frameLoader is None:
             return None
 
-        return self._videoReader[self._frameBar.value()].asnumpy()
+        frame = self._frameLoader.frame(self._frameBar.value())
+
+        if frame is not None:
+            self._lastFrame = frame
+
+        return self._lastFrame
+
+    def _onFrameBarValueChanged(self, i: int):
+        if self._frameLoader is not None:
+            self._frameLoader.request(i)
+
+            if self._frameLoader.frame(i) is not None:
+                self._onFrameChanged()
+
+    def _onFrameLoaded(self, i: int):
+        if i == self._frameBar.value():
+            self._onFrameChanged()
+
+    def _closeFrameLoader(self):
+        if self._frameLoader is not None:
+            self._frameLoader.close()
+            self._frameLoader.deleteLater()
+            self._frameLoader = None
+            self._lastFrame = None
 
     def _setEnabled(self, b: bool):
         self._widget.setEnabled(b)
@@ -196,12 +225,15 @@ class MainWindow(QtWidgets.QMainWindow):
         if self._currentVideoPath is not None:
             self.setWindowTitle("ztrack - " + self._currentVideoPath)
             self._videoReader = VideoReader(self._currentVideoPath)
+            self._closeFrameLoader()
+            self._frameLoader = FrameLoader(self._currentVideoPath, self)
+            self._frameLoader.frameLoaded.connect(self._onFrameLoaded)
             self._frameBar.setMaximum(len(self._videoReader) - 1)
 
             if self._useVideoFPS:
                 self._frameBar.setFps(int(self._videoReader.get_avg_fps()))
 
-            self._onFrameChanged()
+            self._frameLoader.request(self._frameBar.value())
             h, w = self._videoReader[0].shape[:2]
             self._trackingPlotWidget.setRoiDefaultSize(w, h)
             rect = QtCore.QRectF(0, 0, w, h)
@@ -209,9 +241,11 @@ class MainWindow(QtWidgets.QMainWindow):
             self._setEnabled(True)
         else:
             self.setWindowTitle("ztrack")
+            self._closeFrameLoader()
             self._setEnabled(False)
 
     def closeEvent(self, a0: QtGui.QCloseEvent):
+        self._closeFrameLoader()
         self.closedSignal.emit()
         super().closeEvent(a0)
 
@@ -8,9 +8,11 @@ import pandas as pd
 from PyQt5 import QtGui, QtWidgets, QtCore
 
 from ztrack.gui.utils.file import selectVideoDirectories, selectVideoPaths
+from ztrack.results import open_results
 from ztrack.tracking import get_trackers_from_config
 from ztrack.utils.file import (
     get_config_path,
+    get_events_path,
     get_paths_for_view_results,
     get_results_path,
     video_extensions,
@@ -84,7 +86,7 @@ class Annotator(MainWindow):
         event.accept()
 
     def _onOkButtonClicked(self):
-        csv_path = self._currentVideoPath.replace("mp4", "csv")
+        csv_path = get_events_path(self._currentVideoPath)
         pd.DataFrame(self.buffer, columns=["frame", "type"]).to_csv(csv_path, index=False)
         self.buffer.clear()
         self.dequeue()
@@ -151,12 +153,10 @@ class Annotator(MainWindow):
             config_path = get_config_path(self._currentVideoPath)
 
             if results_path.exists() and config_path.exists():
-                store = pd.HDFStore(results_path)
+                store = open_results(results_path)
 
-                for key in store.keys():
-                    self._results[key.lstrip("/")] = pd.DataFrame(
-                        store.get(key)
-                    )
+                for key in store.keys:
+                    self._results[key] = store.get(key)
 
                 with open(config_path) as fp:
                     config_dict = json.load(fp)
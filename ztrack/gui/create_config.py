@@ -4,10 +4,11 @@ import json
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-from PyQt5 import QtWidgets
+from PyQt5 import QtCore, QtWidgets
 
-from ztrack._settings import config_extension
+from ztrack._settings import config_extension, preview_delay_ms
 from ztrack.gui.utils.file import selectVideoDirectories, selectVideoPaths
+from ztrack.gui.utils.preview_worker import PreviewWorker
 from ztrack.tracking import get_trackers
 from ztrack.tracking.tracker import NoneTracker
 from ztrack.utils.file import get_config_dict, get_paths_for_config_creation
@@ -15,9 +16,10 @@ from ztrack._settings import video_extensions
 
 from ._control_widget import ControlWidget
 from ._main_window import MainWindow
+from .preview_grid import PreviewGridDialog, SampledFrames
 
 if TYPE_CHECKING:
-    from typing import List, Optional
+    from typing import List, Optional, Set
 
     from PyQt5 import QtGui
 
@@ -42,6 +44,21 @@ class CreateConfigWindow(MainWindow):
         self._trackerGroups = get_trackers(verbose=verbose, debug=True)
         self._controlWidget = ControlWidget(self)
 
+        # tracking runs in a worker thread, at most once per preview_delay_ms and
+        # tracker group, with the newest frame, ROI and parameters at that time
+        self._pendingPreviews: Set[str] = set()
+        self._previewWorker = PreviewWorker(self)
+        self._previewWorker.previewReady.connect(self._onPreviewReady)
+        self._previewTimer = QtCore.QTimer(self)
+        self._previewTimer.setSingleShot(True)
+        self._previewTimer.setInterval(preview_delay_ms)
+        self._previewTimer.timeout.connect(self._submitPreviews)
+
+        # tracking of frames sampled from the whole video, in a separate window
+        self._sampledFrames = SampledFrames()
+        self._previewGridDialog: Optional[PreviewGridDialog] = None
+        self._previewGridGroup: Optional[str] = None
+
         self._buttonBox = QtWidgets.QDialogButtonBox(self)
         self._buttonBox.setStandardButtons(
             QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel  # type: ignore
@@ -69,6 +86,12 @@ class CreateConfigWindow(MainWindow):
         self._buttonBox.button(QtWidgets.QDialogButtonBox.Ok).clicked.connect(
             self._onOkButtonClicked
         )
+
+        previewGridButton = self._buttonBox.addButton(
+            "Preview frames", QtWidgets.QDialogButtonBox.ActionRole
+        )
+        previewGridButton.clicked.connect(self._onPreviewGridButtonClicked)
+
         self.updateVideo()
 
     @property
@@ -123,25 +146,61 @@ class CreateConfigWindow(MainWindow):
         if img is not None:
             self._trackingPlotWidget.setImage(img)
 
-            for name, tracker in self._trackerGroups.items():
-                index = self._controlWidget.getCurrentTrackerIndex(name)
-                tracker[index].annotate(img)
-                self._trackingPlotWidget.updateRoiGroups()
+            for name in self._trackerGroups:
+                self._requestPreview(name)
 
     def _onTrackerChanged(self, name: str, index: int):
         self._trackingPlotWidget.setTracker(name, index)
-        img = self._currentFrame
-
-        if img is not None:
-            self._trackerGroups[name][index].annotate(self._currentFrame)
-            self._trackingPlotWidget.updateRoiGroups()
+        self._requestPreview(name)
+        self._updatePreviewGrid(name)
 
     def _onRoiChanged(self, name: str):
+        self._requestPreview(name)
+        self._updatePreviewGrid(name)
+
+    def _currentTracker(self, name: str) -> Tracker:
+        return self._trackerGroups[name][self._controlWidget.getCurrentTrackerIndex(name)]
+
+    def _onPreviewGridButtonClicked(self):
+        if self._currentVideoPath is None:
+            return
+
+        if self._previewGridDialog is None:
+            self._previewGridDialog = PreviewGridDialog(self, self._sampledFrames)
+
+        name = list(self._trackerGroups)[self._controlWidget.currentIndex()]
+        self._previewGridGroup = name
+        self._previewGridDialog.setWindowTitle(f"Preview frames - {name}")
+        self._previewGridDialog.setTracker(self._currentVideoPath, self._currentTracker(name))
+        self._previewGridDialog.show()
+        self._previewGridDialog.raise_()
+        self._previewGridDialog.run()
+
+    def _updatePreviewGrid(self, name: str):
+        dialog = self._previewGridDialog
+
+        if dialog is not None and dialog.isVisible() and name == self._previewGridGroup:
+            dialog.setTracker(self._currentVideoPath, self._currentTracker(name))
+            dialog.scheduleRun()
+
+    def _requestPreview(self, name: str):
+        self._pendingPreviews.add(name)
+
+        if not self._previewTimer.isActive():
+            self._previewTimer.start()
+
+    def _submitPreviews(self):
         img = self._currentFrame
 
         if img is not None:
-            index = self._controlWidget.getCurrentTrackerIndex(name)
-            self._trackerGroups[name][index].annotate(img)
+            for name in self._pendingPreviews:
+                self._previewWorker.submit(name, self._currentTracker(name), img)
+
+        self._pendingPreviews.clear()
+
+    def _onPreviewReady(self, name: str, generation: int, tracker: Tracker, results):
+        if self._previewWorker.isCurrent(name, generation):
+            tracker._annotate_preview(results)
             self._trackingPlotWidget.updateRoiGroups()
 
     def _onTabChanged(self, index: int):
@@ -149,11 +208,8 @@ class CreateConfigWindow(MainWindow):
         self._trackingPlotWidget.setTrackerGroup(name)
 
     def _onParamsChanged(self, name: str, index: int):
-        img = self._currentFrame
-
-        if img is not None:
-            self._trackerGroups[name][index].annotate(img)
-            self._trackingPlotWidget.updateRoiGroups()
+        self._requestPreview(name)
+        self._updatePreviewGrid(name)
 
     def _addTrackerGroup(self, name: str, trackers: List[Tracker]):
         self._controlWidget.addTrackerGroup(name, trackers)
@@ -164,6 +220,8 @@ class CreateConfigWindow(MainWindow):
         self._trackingPlotWidget.setStateFromTrackingConfig(trackingConfig)
 
     def updateVideo(self):
+        self._previewWorker.cancel()
+
         if self._currentVideoPath is not None:
             trackingConfig = get_config_dict(self._currentVideoPath)
 
@@ -176,6 +234,20 @@ class CreateConfigWindow(MainWindow):
 
         super().updateVideo()
 
+        if self._previewGridDialog is not None and self._previewGridDialog.isVisible():
+            if self._currentVideoPath is None:
+                self._previewGridDialog.close()
+            else:
+                self._updatePreviewGrid(self._previewGridGroup)
+
+    def closeEvent(self, a0: QtGui.QCloseEvent):
+        self._previewWorker.close()
+
+        if self._previewGridDialog is not None:
+            self._previewGridDialog.shutdown()
+
+        super().closeEvent(a0)
+
     def enqueue(self, videoPath: str, savePaths: List[str], first=False):
         if first:
             self._videoPaths.insert(0, videoPath)
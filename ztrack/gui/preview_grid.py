@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import os
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import pyqtgraph as pg
+from PyQt5 import QtCore, QtWidgets
+
+from ztrack._settings import preview_grid_size
+from ztrack.tracking.mixins.background import BackgroundSubtractionMixin
+from ztrack.utils.background import sample_indices
+from ztrack.utils.video import FrameSource
+
+from ._tracking_plot_widget import roiFromShape
+
+if TYPE_CHECKING:
+    from typing import List, Optional, Tuple
+
+    import numpy as np
+
+    from ztrack.tracking.tracker import Tracker
+
+
+class SampledFrames:
+    """Evenly spaced frames of a video, decoded once and reused between runs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple[str, int]] = None
+        self._frames: List[Tuple[int, np.ndarray]] = []
+
+    def get(self, videoPath: str, n: int) -> List[Tuple[int, np.ndarray]]:
+        with self._lock:
+            if self._key != (videoPath, n):
+                source = FrameSource(videoPath)
+                indices = sample_indices(len(source), n)
+                self._frames = [(i, frame.copy()) for i, frame in source.frames_at(indices)]
+                self._key = (videoPath, n)
+
+            return self._frames
+
+
+class PreviewGridDialog(QtWidgets.QDialog):
+    """Track frames spread across the whole video with the current parameters.
+
+    A copy of the tracker, with the ROI and parameters at the time of the run,
+    tracks every sampled frame in a thread pool. Each thumbnail shows the ROI
+    of its frame with the results, framed green if tracking succeeded and red
+    if it failed. Starting a new run drops whatever is left of the previous one.
+    """
+
+    # generation, thumbnail, frame index, frame, tracker, results of Tracker._preview
+    _previewReady = QtCore.pyqtSignal(int, int, int, object, object, object)
+
+    def __init__(
+        self,
+        parent: QtWidgets.QWidget,
+        frames: SampledFrames,
+        *,
+        nSamples=preview_grid_size,
+        nColumns=4,
+    ):
+        super().__init__(parent)
+        self._frames = frames
+        self._videoPath: Optional[str] = None
+        self._tracker: Optional[Tracker] = None
+        self._generation = 0
+        self._nColumns = nColumns
+        self._nDone = 0
+        self._nPassed = 0
+        self._thumbnails: List[_Thumbnail] = []
+        self._executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+        self._spinBox = QtWidgets.QSpinBox(self)
+        self._spinBox.setRange(1, 100)
+        self._spinBox.setValue(nSamples)
+        self._runButton = QtWidgets.QPushButton(self)
+        self._runButton.setText("Run")
+        self._label = QtWidgets.QLabel(self)
+
+        label = QtWidgets.QLabel(self)
+        label.setText("Frames")
+
+        hBoxLayout = QtWidgets.QHBoxLayout()
+        hBoxLayout.addWidget(label)
+        hBoxLayout.addWidget(self._spinBox)
+        hBoxLayout.addWidget(self._runButton)
+        hBoxLayout.addWidget(self._label)
+        hBoxLayout.addStretch()
+
+        self._gridLayout = QtWidgets.QGridLayout()
+        gridWidget = QtWidgets.QWidget(self)
+        gridWidget.setLayout(self._gridLayout)
+        scrollArea = QtWidgets.QScrollArea(self)
+        scrollArea.setWidgetResizable(True)
+        scrollArea.setWidget(gridWidget)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addLayout(hBoxLayout)
+        layout.addWidget(scrollArea)
+        self.setLayout(layout)
+        self.setWindowTitle("Preview frames")
+        self.resize(900, 700)
+
+        # re-run shortly after the last parameter change rather than on every one
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(300)
+        self._timer.timeout.connect(self.run)
+
+        self._runButton.clicked.connect(self.run)
+        self._spinBox.valueChanged.connect(self.scheduleRun)
+        self._previewReady.connect(self._onPreviewReady)
+
+    def setTracker(self, videoPath: str, tracker: Tracker):
+        self._videoPath = videoPath
+        self._tracker = tracker
+
+    def scheduleRun(self):
+        self._timer.start()
+
+    def run(self):
+        self._timer.stop()
+        self._generation += 1
+
+        if self._videoPath is None or self._tracker is None:
+            return
+
+        n = self._spinBox.value()
+        self._setNumberOfThumbnails(n)
+        self._nDone = self._nPassed = 0
+        self._label.setText("Tracking...")
+
+        for thumbnail in self._thumbnails:
+            thumbnail.setPending()
+
+        # snapshot of the ROI and parameters, safe from changes made while tracking
+        tracker = pickle.loads(pickle.dumps(self._tracker))
+        self._executor.submit(self._track, self._generation, self._videoPath, n, tracker)
+
+    def shutdown(self):
+        self._generation += 1
+        self._executor.shutdown(wait=False)
+
+    def _track(self, generation: int, videoPath: str, n: int, tracker: Tracker):
+        try:
+            frames = self._frames.get(videoPath, n)
+
+            if isinstance(tracker, BackgroundSubtractionMixin):
+                tracker.ensure_background()
+        except Exception as e:
+            self._previewReady.emit(generation, -1, -1, None, None, e)
+            return
+
+        state = pickle.dumps(tracker)
+
+        for k, (i, frame) in enumerate(frames):
+            # trackers may keep state between frames, so every frame gets its own copy
+            self._executor.submit(self._trackFrame, generation, k, i, frame, pickle.loads(state))
+
+    def _trackFrame(self, generation: int, k: int, i: int, frame: np.ndarray, tracker: Tracker):
+        if generation != self._generation:
+            return
+
+        try:
+            results = tracker._preview(frame)
+        except Exception as e:
+            results = e
+
+        self._previewReady.emit(generation, k, i, frame, tracker, results)
+
+    def _onPreviewReady(self, generation: int, k: int, i: int, frame, tracker, results):
+        if generation != self._generation:
+            return
+
+        if k < 0:
+            self._label.setText(f"Failed to load the frames: {results}")
+            return
+
+        passed = not isinstance(results, Exception)
+        tracker._annotate_preview(results)
+        self._thumbnails[k].setResults(tracker, frame, i, passed)
+        self._nDone += 1
+        self._nPassed += passed
+        self._label.setText(f"{self._nPassed}/{self._nDone} frames tracked")
+
+    def _setNumberOfThumbnails(self, n: int):
+        while len(self._thumbnails) > n:
+            thumbnail = self._thumbnails.pop()
+            self._gridLayout.removeWidget(thumbnail)
+            thumbnail.deleteLater()
+
+        while len(self._thumbnails) < n:
+            k = len(self._thumbnails)
+            thumbnail = _Thumbnail(self)
+            self._gridLayout.addWidget(thumbnail, k // self._nColumns, k % self._nColumns)
+            self._thumbnails.append(thumbnail)
+
+    def closeEvent(self, a0):
+        # drop the rest of the current run
+        self._generation += 1
+        super().closeEvent(a0)
+
+
+class _Thumbnail(QtWidgets.QFrame):
+    def __init__(self, parent: QtWidgets.QWidget = None):
+        super().__init__(parent)
+
+        self._graphicsLayoutWidget = pg.GraphicsLayoutWidget(self)
+        self._graphicsLayoutWidget.setBackground(None)
+        self._graphicsLayoutWidget.setMinimumSize(160, 160)
+        self._viewBox = self._graphicsLayoutWidget.addViewBox()
+        self._viewBox.invertY(True)
+        self._viewBox.setAspectLocked(True)
+        self._imageItem = pg.ImageItem()
+        self._viewBox.addItem(self._imageItem)
+        self._shapes: list = []
+        self._label = QtWidgets.QLabel(self)
+        self._label.setAlignment(QtCore.Qt.AlignCenter)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.setContentsMargins(2, 2, 2, 2)
+        layout.addWidget(self._graphicsLayoutWidget)
+        layout.addWidget(self._label)
+        self.setLayout(layout)
+        self.setPending()
+
+    def setPending(self):
+        self._setBorder("gray")
+        self._label.setText("...")
+
+    def setResults(self, tracker: Tracker, frame: np.ndarray, i: int, passed: bool):
+        # the shapes are in frame coordinates, so the ROI crop is placed at its
+        # position in the frame
+        x0, y0 = (0, 0) if tracker.roi.value is None else tracker.roi.value[:2]
+        self._imageItem.setImage(frame[tracker.roi.to_slice()])
+        self._imageItem.setPos(x0, y0)
+
+        for shape in self._shapes:
+            self._viewBox.removeItem(shape)
+
+        self._shapes = [roiFromShape(shape) for shape in tracker.shapes]
+
+        for shape in self._shapes:
+            self._viewBox.addItem(shape)
+
+        self._viewBox.autoRange()
+        self._setBorder("green" if passed else "red")
+        self._label.setText(f"Frame {i}" if passed else f"Frame {i} (failed)")
+
+    def _setBorder(self, color: str):
+        self.setStyleSheet(f"_Thumbnail {{ border: 2px solid {color}; }}")
@@ -4,11 +4,12 @@ import json
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-import pandas as pd
 from PyQt5 import QtGui, QtWidgets
 
 from ztrack.gui.utils.file import selectVideoDirectories, selectVideoPaths
+from ztrack.results.lazy import LazyResults
 from ztrack.tracking import get_trackers_from_config
+from ztrack.tracking.tracker import ResultRecords
 from ztrack.utils.file import (
     get_config_path,
     get_paths_for_view_results,
@@ -19,7 +20,7 @@ from ztrack.utils.file import (
 from ._main_window import MainWindow
 
 if TYPE_CHECKING:
-    from typing import Dict, List
+    from typing import Dict, List, Optional
 
     from ztrack.tracking.tracker import Tracker
 
@@ -37,7 +38,8 @@ class TrackingViewer(MainWindow):
             parent, videoPaths=videoPaths, verbose=verbose, dock=dock
         )
 
-        self._results: Dict[str, pd.DataFrame] = {}
+        self._results: Optional[LazyResults] = None
+        self._records: Dict[str, ResultRecords] = {}
         self._trackers: Dict[str, Tracker] = {}
 
         self._buttonBox = QtWidgets.QDialogButtonBox(self)
@@ -73,10 +75,11 @@ class TrackingViewer(MainWindow):
         if img is not None:
             self._trackingPlotWidget.setImage(img)
 
-            for name, tracker in self._trackers.items():
-                tracker.annotate_from_series(
-                    self._results[name].iloc[self._frameBar.value()]
-                )
+            if self._results is not None:
+                self._results.request(self._frameBar.value())
+
+            for records in self._records.values():
+                records.annotate(self._frameBar.value())
                 self._trackingPlotWidget.updateRoiGroups()
 
     def enqueue(self, videoPath: str, first=False):
@@ -114,29 +117,44 @@ class TrackingViewer(MainWindow):
 
     def updateVideo(self):
         self._trackingPlotWidget.clearShapes()
+        self._closeResults()
 
         if self._currentVideoPath is not None:
             results_path = get_results_path(self._currentVideoPath)
             config_path = get_config_path(self._currentVideoPath)
 
             if results_path.exists() and config_path.exists():
-                store = pd.HDFStore(results_path)
-
-                for key in store.keys():
-                    self._results[key.lstrip("/")] = pd.DataFrame(
-                        store.get(key)
-                    )
+                # rows are read in blocks around the frames being shown
+                self._results = LazyResults(results_path)
 
                 with open(config_path) as fp:
                     config_dict = json.load(fp)
                 self._trackers = get_trackers_from_config(config_dict)
+                self._records = {
+                    name: ResultRecords(
+                        tracker,
+                        values=self._results.rows(name),
+                        columns=self._results.rows(name).columns,
+                    )
+                    for name, tracker in self._trackers.items()
+                    if name in self._results
+                }
 
                 for name, tracker in self._trackers.items():
                     self._trackingPlotWidget.addTrackerGroup(name, [tracker])
-                store.close()
 
         super().updateVideo()
 
+    def _closeResults(self):
+        if self._results is not None:
+            self._results.close()
+            self._results = None
+            self._records = {}
+
+    def closeEvent(self, a0: QtGui.QCloseEvent):
+        self._closeResults()
+        super().closeEvent(a0)
+
     def dragEnterEvent(self, event: QtGui.QDragEnterEvent) -> None:
         if event.mimeData().hasUrls():
             paths = [u.toLocalFile() for u in event.mimeData().urls()]
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from decord import VideoReader
+from PyQt5 import QtCore
+
+from ztrack._settings import frame_cache_size, frame_read_ahead
+
+if TYPE_CHECKING:
+    from typing import Optional
+
+    import numpy as np
+
+
+class FrameLoader(QtCore.QObject):
+    """Decode the frames of a video in a background thread.
+
+    Frames are requested with ``request`` and announced with ``frameLoaded``
+    once decoded. Only the newest request is served: if the slider moved on
+    while a frame was being decoded, the frames in between are skipped. After
+    serving a request, the loader reads ahead up to ``readAhead`` frames in
+    the direction the requests have been moving, so that playback and
+    scrubbing mostly hit the LRU cache of the last ``cacheSize`` frames.
+    """
+
+    frameLoaded = QtCore.pyqtSignal(int)
+
+    def __init__(
+        self,
+        videoPath: str,
+        parent: QtCore.QObject = None,
+        *,
+        cacheSize=frame_cache_size,
+        readAhead=frame_read_ahead,
+    ):
+        super().__init__(parent)
+        self._videoPath = videoPath
+        self._cacheSize = max(cacheSize, readAhead + 1)
+        self._readAhead = readAhead
+        self._cache: OrderedDict[int, np.ndarray] = OrderedDict()
+        self._condition = threading.Condition()
+        self._requested: Optional[int] = None
+        self._lastRequested = 0
+        self._direction = 1
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def frame(self, i: int) -> Optional[np.ndarray]:
+        with self._condition:
+            frame = self._cache.get(i)
+
+            if frame is not None:
+                self._cache.move_to_end(i)
+
+            return frame
+
+    def request(self, i: int):
+        with self._condition:
+            if i != self._lastRequested:
+                self._direction = 1 if i > self._lastRequested else -1
+
+            self._lastRequested = i
+            self._requested = i
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        self._thread.join()
+
+    def _run(self):
+        # decord readers are not shared between threads, this one is only used here
+        videoReader = VideoReader(self._videoPath)
+        n = len(videoReader)
+
+        while True:
+            with self._condition:
+                while self._requested is None and not self._closed:
+                    self._condition.wait()
+
+                if self._closed:
+                    return
+
+                i, self._requested = self._requested, None
+                direction = self._direction
+
+            if self._load(videoReader, i):
+                self.frameLoaded.emit(i)
+
+            for j in range(1, self._readAhead + 1):
+                k = i + j * direction
+
+                if not 0 <= k < n or self._isInterrupted():
+                    break
+
+                self._load(videoReader, k)
+
+    def _isInterrupted(self):
+        with self._condition:
+            return self._closed or self._requested is not None
+
+    def _load(self, videoReader: VideoReader, i: int) -> bool:
+        with self._condition:
+            if i in self._cache:
+                self._cache.move_to_end(i)
+                return True
+
+        try:
+            frame = videoReader[i].asnumpy()
+        except Exception:
+            return False
+
+        with self._condition:
+            self._cache[i] = frame
+
+            while len(self._cache) > self._cacheSize:
+                self._cache.popitem(last=False)
+
+        return True
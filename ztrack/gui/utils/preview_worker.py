@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import pickle
+import threading
+from typing import TYPE_CHECKING
+
+from PyQt5 import QtCore
+
+if TYPE_CHECKING:
+    from typing import Dict, Hashable, Tuple
+
+    import numpy as np
+
+    from ztrack.tracking.tracker import Tracker
+
+
+class PreviewWorker(QtCore.QObject):
+    """Track preview frames in a background thread.
+
+    Previews are submitted per key (e.g. a tracker group). A preview that is
+    submitted while an older one for the same key is still waiting replaces
+    it, so intermediate parameter states are never tracked, and
+    ``previewReady`` is only emitted for the newest preview of a key. Since a
+    newer preview may be submitted while the signal is on its way to the GUI
+    thread, receivers should check ``isCurrent`` before showing the results.
+
+    A copy of the tracker is taken when a preview is submitted and tracked in
+    its place, so the GUI can go on changing the ROI, the parameters and the
+    video of the tracker itself.
+    """
+
+    # key, generation, submitted tracker, results of Tracker._preview of its
+    # copy (or the exception it raised)
+    previewReady = QtCore.pyqtSignal(object, int, object, object)
+
+    def __init__(self, parent: QtCore.QObject = None):
+        super().__init__(parent)
+        self._condition = threading.Condition()
+        self._generations: Dict[Hashable, int] = {}
+        self._pending: Dict[Hashable, Tuple[int, Tracker, bytes, np.ndarray]] = {}
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, key: Hashable, tracker: Tracker, frame: np.ndarray) -> int:
+        snapshot = pickle.dumps(tracker)
+
+        with self._condition:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+            self._pending[key] = (generation, tracker, snapshot, frame)
+            self._condition.notify()
+
+        return generation
+
+    def cancel(self):
+        # drop every waiting preview, and the results of the ones being tracked
+        with self._condition:
+            for key in self._generations:
+                self._generations[key] += 1
+
+            self._pending.clear()
+
+    def isCurrent(self, key: Hashable, generation: int) -> bool:
+        with self._condition:
+            return self._generations.get(key) == generation
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+
+                if self._closed:
+                    return
+
+                key = next(iter(self._pending))
+                generation, tracker, snapshot, frame = self._pending.pop(key)
+
+            try:
+                results = pickle.loads(snapshot)._preview(frame)
+            except Exception as e:
+                results = e
+
+            if self.isCurrent(key, generation):
+                self.previewReady.emit(key, generation, tracker, results)
@@ -9,6 +9,7 @@ from superqt import QLabeledDoubleRangeSlider
 from ztrack.utils.variable import (
     Angle,
     Bool,
+    Choice,
     Float,
     FloatRange,
     Int,
@@ -48,6 +49,8 @@ class VariableWidget(QtWidgets.QWidget, ABC, metaclass=AbstractWidgetMeta):
             return RectWidget(parent, variable=variable)
         if isinstance(variable, String):
             return StringWidget(parent, variable=variable)
+        if isinstance(variable, Choice):
+            return ChoiceWidget(parent, variable=variable)
         if isinstance(variable, Bool):
             return BoolWidget(parent, variable=variable)
         if isinstance(variable, FloatRange):
@@ -126,6 +129,25 @@ class StringWidget(VariableWidget):
         self._line.setText(value)
 
 
+class ChoiceWidget(VariableWidget):
+    def __init__(self, parent: QtWidgets.QWidget = None, *, variable: Choice):
+        super().__init__(parent, variable=variable)
+
+        self._comboBox = QtWidgets.QComboBox(self)
+        self._comboBox.addItems(variable.choices)
+        self._comboBox.setCurrentText(variable.value)
+        layout = QtWidgets.QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self._comboBox)
+        self.setLayout(layout)
+        self._comboBox.currentTextChanged.connect(self._setValue)
+
+    def _setGuiValue(self, value):
+        self._comboBox.blockSignals(True)
+        self._comboBox.setCurrentText(value)
+        self._comboBox.blockSignals(False)
+
+
 class IntWidget(VariableWidget):
     def __init__(self, parent: QtWidgets.QWidget = None, *, variable: Int):
         super().__init__(parent, variable=variable)
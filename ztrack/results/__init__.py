@@ -0,0 +1,63 @@
+import os
+import shutil
+from pathlib import Path
+
+from ztrack._settings import commit_interval
+
+from .base import ResultsReader, ResultsWriter
+from .columnar import ColumnarResultsReader, ColumnarResultsWriter
+from .hdf import HDFResultsReader, HDFResultsWriter
+
+results_formats = ("hdf", "columnar")
+
+
+def open_results(path) -> ResultsReader:
+    """Open the results at ``path`` with the reader for its format."""
+    if Path(path).is_dir():
+        return ColumnarResultsReader(path)
+    return HDFResultsReader(path)
+
+
+def create_writer(path, results_format="hdf", **kwargs) -> ResultsWriter:
+    if results_format == "columnar":
+        return ColumnarResultsWriter(path, **kwargs)
+    if results_format == "hdf":
+        return HDFResultsWriter(path, **kwargs)
+    raise ValueError(f"Unknown results format {results_format}")
+
+
+def replace_results(src, dst):
+    """Move results to ``dst``, replacing whatever results are there."""
+    if Path(dst).is_dir():
+        shutil.rmtree(dst)
+    elif Path(src).is_dir() and Path(dst).exists():
+        os.remove(dst)
+
+    os.replace(src, dst)
+
+
+def copy_results(
+    reader: ResultsReader, writer: ResultsWriter, keys=None, chunk_size=commit_interval
+):
+    """Append the tables ``keys`` (all by default) of ``reader`` to ``writer``, with their stamps."""
+    for key in reader.keys if keys is None else keys:
+        if key in writer.keys:
+            # left over from an interrupted copy
+            writer.remove(key)
+            writer.failed.discard(key)
+
+        # empty tables are copied too
+        for start in range(0, max(reader.n_rows(key), 1), chunk_size):
+            writer.append(key, reader.read(key, start, start + chunk_size))
+
+        if key in reader.stamps:
+            writer.stamps[key] = reader.stamps[key]
+
+
+def convert_results(src, dst, results_format="columnar", chunk_size=commit_interval, **kwargs):
+    """Copy the results at ``src`` to ``dst`` in ``results_format``, ``chunk_size`` rows at a time."""
+    with open_results(src) as reader, create_writer(dst, results_format, **kwargs) as writer:
+        copy_results(reader, writer, chunk_size=chunk_size)
+        writer.failed = set(reader.failed)
+        writer.stamps = dict(reader.stamps)
+        writer.commit(reader.n_frames)
@@ -0,0 +1,113 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+
+class ResultsWriter(ABC):
+    """Append the results of a video to a store, chunk by chunk.
+
+    After the rows of a chunk of frames have been appended for all keys,
+    ``commit`` records the number of frames that are complete, so that an
+    interrupted run can be resumed from there with ``resume=True``. Keys of
+    trackers that failed are removed and remembered in ``failed``. ``stamps``
+    maps keys to the ``results_stamp`` they were tracked with and is committed
+    along with them.
+    """
+
+    n_frames: int
+    failed: Set[str]
+    stamps: Dict[str, str]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    @abstractmethod
+    def keys(self) -> List[str]:
+        pass
+
+    @abstractmethod
+    def append(self, key: str, df: pd.DataFrame):
+        pass
+
+    @abstractmethod
+    def remove(self, key: str):
+        pass
+
+    @abstractmethod
+    def commit(self, n_frames: int):
+        pass
+
+    @abstractmethod
+    def close(self):
+        pass
+
+
+class ResultsReader(ABC):
+    """Read the results of a video, whole or by rows and columns.
+
+    ``store[key]`` returns a whole table like ``pd.HDFStore`` does, ``read``
+    returns a range of rows (positions, not frame numbers) and ``array``
+    returns the same as a plain 2-D array. ``n_frames``, ``failed`` and
+    ``stamps`` are what the writer last committed.
+    """
+
+    n_frames: int
+    failed: List[str]
+    stamps: Dict[str, str]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __contains__(self, key: str):
+        return key.lstrip("/") in self.keys
+
+    def __getitem__(self, key: str) -> pd.DataFrame:
+        return self.read(key)
+
+    def get(self, key: str) -> pd.DataFrame:
+        return self.read(key)
+
+    @property
+    @abstractmethod
+    def keys(self) -> List[str]:
+        pass
+
+    @abstractmethod
+    def columns(self, key: str) -> pd.Index:
+        pass
+
+    @abstractmethod
+    def n_rows(self, key: str) -> int:
+        pass
+
+    @abstractmethod
+    def read(self, key: str, start=None, stop=None, columns=None) -> pd.DataFrame:
+        pass
+
+    def array(self, key: str, start=None, stop=None, columns=None) -> np.ndarray:
+        return self.read(key, start, stop, columns).to_numpy()
+
+    def reads_row_ranges(self, key: str) -> bool:
+        """Whether reading a range of rows is cheaper than reading the whole table."""
+        return True
+
+    @abstractmethod
+    def close(self):
+        pass
+
+    def _column_indexer(self, key: str, columns) -> Optional[np.ndarray]:
+        if columns is None:
+            return None
+
+        # any labels that select columns with .loc, e.g. body parts of a MultiIndex
+        positions = pd.Series(np.arange(len(self.columns(key))), index=self.columns(key))
+        return np.atleast_1d(positions.loc[columns].to_numpy())
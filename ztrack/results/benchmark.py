@@ -0,0 +1,178 @@
+"""Benchmark the codecs of the results store.
+
+    python -m ztrack.results.benchmark [--results video.h5] [--directory /nas/tmp]
+
+Every codec writes the same tables the way ``ztrack run`` does (appended and
+committed every ``commit_interval`` frames), then the store is reopened and
+read back whole. Tables are synthetic eye and tail results, or the tables of
+an existing results file with ``--results``. Write to the storage the results
+will live on (``--directory``) to include its latency and bandwidth.
+"""
+import os
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+import click
+import numpy as np
+import pandas as pd
+import tables
+
+from ztrack._settings import commit_interval
+from ztrack.tracking.eye.eye_tracker import EyeTracker
+from ztrack.tracking.tail.tail_tracker import TailTracker
+
+from . import create_writer, open_results
+
+default_codecs = (
+    "none",
+    "zlib:1",
+    "zlib:5",
+    "lzo:5",
+    "blosc:blosclz:5",
+    "blosc:lz4:5",
+    "blosc:lz4:5:bit",
+    "blosc:lz4hc:5",
+    "blosc:zstd:3",
+    "blosc:zstd:3:bit",
+    "columnar",
+)
+
+
+def parse_codec(codec: str) -> Tuple[str, dict]:
+    """``complib[:complevel[:shuffle]]``, ``none`` or ``columnar`` -> (format, writer options)."""
+    if codec == "columnar":
+        return "columnar", {}
+    if codec == "none":
+        return "hdf", dict(complevel=0)
+
+    parts = codec.split(":")
+
+    # blosc compressors have a colon in their name
+    if parts[0] in ("blosc", "blosc2") and len(parts) > 1 and not parts[1].isdigit():
+        parts = [":".join(parts[:2]), *parts[2:]]
+
+    options = dict(complib=parts[0], complevel=int(parts[1]) if len(parts) > 1 else 5)
+
+    if len(parts) > 2:
+        options["shuffle"] = parts[2]
+
+    return "hdf", options
+
+
+def synthetic_results(n_frames: int, n_points: int, seed=0) -> Dict[str, pd.DataFrame]:
+    """Eye and tail tables with the columns, smoothness and NaN gaps of real results."""
+    rng = np.random.default_rng(seed)
+
+    def walk(shape, scale):
+        return np.cumsum(rng.normal(0, scale, (n_frames, *shape)), axis=0)
+
+    centers = np.array([[100, 90], [100, 110], [130, 100]]) + walk((3, 2), 0.05)
+    axes = np.array([[12, 6], [12, 6], [9, 7]]) + rng.normal(0, 0.2, (n_frames, 3, 2))
+    theta = np.array([80, 100, 90]) + walk((3,), 0.5)
+    eye = np.concatenate([centers, axes, theta[..., None]], axis=-1)
+
+    # a tail that bends back and forth from the swim bladder
+    angle = np.deg2rad(180 + walk((1,), 0.3) + np.cumsum(walk((n_points,), 0.05), axis=1))
+    steps = 3 * np.stack([np.cos(angle), np.sin(angle)], axis=-1)
+    tail = centers[:, 2:3] + np.cumsum(steps, axis=1)
+
+    # failed frames
+    failed = rng.random(n_frames) < 0.01
+    eye[failed] = np.nan
+    tail[failed] = np.nan
+
+    return dict(
+        eye=EyeTracker._results_to_dataframe(eye),
+        tail=TailTracker._results_to_dataframe(tail),
+    )
+
+
+def size_of(path) -> int:
+    if os.path.isdir(path):
+        return sum(
+            os.path.getsize(os.path.join(root, file))
+            for root, _, files in os.walk(path)
+            for file in files
+        )
+    return os.path.getsize(path)
+
+
+def benchmark_codec(
+    codec: str, dfs: Dict[str, pd.DataFrame], directory, repeat=3, chunk_size=commit_interval
+) -> dict:
+    results_format, options = parse_codec(codec)
+    path = os.path.join(directory, f"benchmark{'.ztr' if results_format == 'columnar' else '.h5'}")
+    n_frames = max(map(len, dfs.values()))
+    write_times: List[float] = []
+    read_times: List[float] = []
+
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+
+        with create_writer(path, results_format, **options) as writer:
+            for start in range(0, n_frames, chunk_size):
+                for key, df in dfs.items():
+                    writer.append(key, df.iloc[start : start + chunk_size])
+
+                writer.commit(min(start + chunk_size, n_frames))
+
+        t1 = time.perf_counter()
+
+        with open_results(path) as reader:
+            for key in reader.keys:
+                reader[key]
+
+        t2 = time.perf_counter()
+        write_times.append(t1 - t0)
+        read_times.append(t2 - t1)
+
+    n_bytes = sum(df.memory_usage(index=False).sum() for df in dfs.values())
+    size = size_of(path)
+
+    return {
+        "codec": codec,
+        "size (MB)": size / 1e6,
+        "ratio": n_bytes / size,
+        "write (MB/s)": n_bytes / 1e6 / min(write_times),
+        "read (MB/s)": n_bytes / 1e6 / min(read_times),
+        "write (s)": min(write_times),
+        "read (s)": min(read_times),
+    }
+
+
+@click.command()
+@click.option("--results", type=click.Path(exists=True), help="Benchmark on these tables.")
+@click.option("--n-frames", default=200000, show_default=True, help="Synthetic frames.")
+@click.option("--n-points", default=51, show_default=True, help="Synthetic tail points.")
+@click.option(
+    "--codec",
+    "codecs",
+    multiple=True,
+    default=default_codecs,
+    show_default=True,
+    help="complib[:complevel[:shuffle]], 'none' or 'columnar' (can be repeated).",
+)
+@click.option("--directory", type=click.Path(file_okay=False), help="Where to write the stores.")
+@click.option("--repeat", default=3, show_default=True, help="Best of this many runs.")
+def main(results, n_frames, n_points, codecs, directory, repeat):
+    if results is not None:
+        with open_results(results) as reader:
+            dfs = {key: reader[key] for key in reader.keys}
+    else:
+        dfs = synthetic_results(n_frames, n_points)
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        rows = []
+
+        for codec in codecs:
+            try:
+                rows.append(benchmark_codec(codec, dfs, tmp, repeat))
+            except (ValueError, tables.HDF5ExtError) as e:
+                click.echo(f"Skipping {codec}: {e}", err=True)
+
+    click.echo(pd.DataFrame(rows).set_index("codec").round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Set
+
+import numpy as np
+import pandas as pd
+
+from .base import ResultsReader, ResultsWriter
+
+_meta_file = "meta.json"
+_version = 1
+
+
+def _encode_columns(columns: pd.Index):
+    values = [list(c) if isinstance(c, tuple) else [c] for c in columns]
+    return json.loads(
+        json.dumps(dict(names=list(columns.names), values=values), default=_to_builtin)
+    )
+
+
+def _decode_columns(columns: dict) -> pd.Index:
+    if len(columns["names"]) > 1:
+        return pd.MultiIndex.from_tuples(map(tuple, columns["values"]), names=columns["names"])
+    return pd.Index([c for c, in columns["values"]], name=columns["names"][0])
+
+
+def _to_builtin(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class ColumnarResultsWriter(ResultsWriter):
+    """Write tracking results to a directory of column-major ``.npy`` chunks.
+
+    Every appended data frame becomes one chunk, ``<key>/<start>.npy``, holding
+    an array of shape (columns, rows) in a single dtype, so that a column of a
+    chunk is contiguous on disk. ``meta.json`` lists the columns, dtype and
+    chunks of every key and is only replaced on ``commit``, so chunks written
+    after the last commit are ignored (and deleted when resuming).
+    """
+
+    def __init__(self, path, *, resume=False):
+        self._path = Path(path)
+        self.n_frames = 0
+        self.failed: Set[str] = set()
+        self.stamps: Dict[str, str] = {}
+        self._keys: Dict[str, dict] = {}
+
+        if resume and (self._path / _meta_file).exists():
+            with open(self._path / _meta_file) as fp:
+                meta = json.load(fp)
+
+            self.n_frames = meta["n_frames"]
+            self.failed = set(meta["failed"])
+            self.stamps = meta.get("stamps", {})
+            self._keys = meta["keys"]
+            self._remove_uncommitted()
+        else:
+            if self._path.exists():
+                shutil.rmtree(self._path)
+
+            self._path.mkdir(parents=True)
+
+    @property
+    def keys(self):
+        return list(self._keys)
+
+    def append(self, key: str, df: pd.DataFrame):
+        data = df.to_numpy()
+
+        if data.dtype.kind not in "biuf":
+            raise ValueError(f"Cannot store non-numeric results of {key}")
+
+        columns = _encode_columns(df.columns)
+        meta = self._keys.setdefault(key, dict(columns=columns, dtype=data.dtype.str, chunks=[]))
+
+        if meta["columns"] != columns:
+            raise ValueError(f"Columns of {key} changed between chunks")
+
+        start = int(df.index[0]) if len(df) > 0 else self._stop(key)
+        (self._path / key).mkdir(exist_ok=True)
+        np.save(self._path / key / f"{start}.npy", data.astype(meta["dtype"]).T)
+        meta["chunks"].append([start, start + len(df)])
+
+    def remove(self, key: str):
+        if key in self._keys:
+            del self._keys[key]
+            shutil.rmtree(self._path / key, ignore_errors=True)
+
+        self.failed.add(key)
+
+    def commit(self, n_frames: int):
+        meta = dict(
+            version=_version,
+            n_frames=n_frames,
+            failed=sorted(self.failed),
+            stamps=self.stamps,
+            keys=self._keys,
+        )
+        tmp = self._path / (_meta_file + ".tmp")
+
+        with open(tmp, "w") as fp:
+            json.dump(meta, fp, default=_to_builtin)
+
+        os.replace(tmp, self._path / _meta_file)
+        self.n_frames = n_frames
+
+    def close(self):
+        pass
+
+    def _stop(self, key: str):
+        chunks = self._keys[key]["chunks"] if key in self._keys else []
+        return chunks[-1][1] if chunks else 0
+
+    def _remove_uncommitted(self):
+        for directory in filter(Path.is_dir, self._path.iterdir()):
+            chunks = self._keys[directory.name]["chunks"] if directory.name in self._keys else []
+            committed = {f"{start}.npy" for start, _ in chunks}
+
+            for file in directory.iterdir():
+                if file.name not in committed:
+                    file.unlink()
+
+
+class ColumnarResultsReader(ResultsReader):
+    """Results written by ``ColumnarResultsWriter``.
+
+    Chunks are memory-mapped, so reading a column or a range of rows only
+    touches the parts of the files that are needed. ``array`` returns a view of
+    the memory-mapped chunk when the rows are all in one chunk.
+    """
+
+    def __init__(self, path):
+        self._path = Path(path)
+
+        with open(self._path / _meta_file) as fp:
+            meta = json.load(fp)
+
+        if meta["version"] > _version:
+            raise ValueError(f"Unsupported results version {meta['version']} in {path}")
+
+        self.n_frames: int = meta["n_frames"]
+        self.failed: List[str] = meta["failed"]
+        self.stamps: Dict[str, str] = meta.get("stamps", {})
+        self._meta: Dict[str, dict] = meta["keys"]
+        self._columns = {key: _decode_columns(m["columns"]) for key, m in self._meta.items()}
+        self._chunks: Dict[str, List[np.ndarray]] = {}
+
+    @property
+    def keys(self):
+        return list(self._meta)
+
+    def columns(self, key: str) -> pd.Index:
+        return self._columns[key.lstrip("/")]
+
+    def n_rows(self, key: str) -> int:
+        return sum(stop - start for start, stop in self._meta[key.lstrip("/")]["chunks"])
+
+    def read(self, key: str, start=None, stop=None, columns=None) -> pd.DataFrame:
+        key = key.lstrip("/")
+        start, stop, _ = slice(start, stop).indices(self.n_rows(key))
+        stop = max(start, stop)
+        data = self.array(key, start, stop, columns)
+        index = self._index(key)[start:stop]
+        all_columns = self.columns(key)
+
+        if columns is not None:
+            all_columns = all_columns[self._column_indexer(key, columns)]
+
+        return pd.DataFrame(np.array(data), index=index, columns=all_columns)
+
+    def array(self, key: str, start=None, stop=None, columns=None) -> np.ndarray:
+        key = key.lstrip("/")
+        start, stop, _ = slice(start, stop).indices(self.n_rows(key))
+        stop = max(start, stop)
+        indexer = self._column_indexer(key, columns)
+        parts = []
+        offset = 0
+
+        for chunk in self._load_chunks(key):
+            n = chunk.shape[1]
+            lo, hi = max(start - offset, 0), min(stop - offset, n)
+
+            if lo < hi:
+                part = chunk[:, lo:hi] if indexer is None else chunk[indexer, lo:hi]
+                parts.append(part.T)
+
+            offset += n
+
+        if len(parts) == 1:
+            return parts[0]
+
+        if not parts:
+            n_columns = len(self.columns(key)) if indexer is None else len(indexer)
+            return np.empty((0, n_columns), dtype=self._meta[key]["dtype"])
+
+        return np.concatenate(parts)
+
+    def close(self):
+        self._chunks.clear()
+
+    def _index(self, key: str) -> pd.Index:
+        chunks = self._meta[key]["chunks"]
+
+        # results are written frame by frame, so chunks are almost always contiguous
+        if all(a[1] == b[0] for a, b in zip(chunks, chunks[1:])):
+            return pd.RangeIndex(chunks[0][0], chunks[-1][1]) if chunks else pd.RangeIndex(0)
+
+        return pd.Index(np.concatenate([np.arange(start, stop) for start, stop in chunks]))
+
+    def _load_chunks(self, key: str) -> List[np.ndarray]:
+        if key not in self._chunks:
+            self._chunks[key] = [
+                np.load(self._path / key / f"{start}.npy", mmap_mode="r")
+                for start, _ in self._meta[key]["chunks"]
+            ]
+
+        return self._chunks[key]
@@ -0,0 +1,165 @@
+import json
+from typing import Dict, Optional, Set
+
+import pandas as pd
+import tables
+
+from .base import ResultsReader, ResultsWriter
+
+complibs = tuple(tables.filters.all_complibs)
+shuffle_filters = ("none", "byte", "bit")
+
+
+def make_filters(complib="zlib", complevel=0, shuffle="byte") -> Optional[tables.Filters]:
+    """PyTables filters for the options of ``HDFResultsWriter``, ``None`` if uncompressed."""
+    if complib not in complibs:
+        raise ValueError(f"Unknown compression library {complib}")
+    if shuffle not in shuffle_filters:
+        raise ValueError(f"Unknown shuffle filter {shuffle}")
+    if not complevel:
+        return None
+
+    return tables.Filters(
+        complevel, complib, shuffle=shuffle == "byte", bitshuffle=shuffle == "bit"
+    )
+
+
+def _read_stamps(attrs) -> Dict[str, str]:
+    # stores committed before results were stamped have none
+    return json.loads(attrs.ztrack_stamps) if "ztrack_stamps" in attrs else {}
+
+
+class HDFResultsWriter(ResultsWriter):
+    """Append tracking results to an HDF5 store while a video is being tracked.
+
+    Every key is an appendable table. After the rows of a chunk of frames have
+    been appended for all keys, ``commit`` records the number of frames that
+    are complete, so that an interrupted run can be resumed from there with
+    ``resume=True``. Rows beyond the last commit are discarded when resuming.
+
+    Tables are compressed with ``complib`` at ``complevel`` (0 disables
+    compression), after a byte or bit ``shuffle`` of their values.
+    """
+
+    def __init__(self, path, *, complib="zlib", complevel=0, shuffle="byte", resume=False):
+        filters = make_filters(complib, complevel, shuffle)
+        self._store = pd.HDFStore(
+            path, mode="a" if resume else "w", complib=complib, complevel=complevel
+        )
+
+        if filters is not None:
+            # pandas has no option for the shuffle filters, tables created from
+            # here on use the store's filters
+            self._store._filters = filters
+
+        self.n_frames = 0
+        self.failed: Set[str] = set()
+        self.stamps: Dict[str, str] = {}
+
+        attrs = self._store.root._v_attrs
+
+        if resume and "ztrack_n_frames" in attrs:
+            self.n_frames = int(attrs.ztrack_n_frames)
+            self.failed = set(attrs.ztrack_failed)
+            self.stamps = _read_stamps(attrs)
+
+        for key in self.keys:
+            if self._store.get_storer(key).nrows > self.n_frames:
+                self._store.remove(key, start=self.n_frames)
+
+    @property
+    def keys(self):
+        return [key.lstrip("/") for key in self._store.keys()]
+
+    def append(self, key: str, df: pd.DataFrame):
+        self._store.append(key, df, format="table", index=False)
+
+    def remove(self, key: str):
+        if key in self.keys:
+            self._store.remove(key)
+
+        self.failed.add(key)
+
+    def commit(self, n_frames: int):
+        attrs = self._store.root._v_attrs
+        attrs.ztrack_n_frames = n_frames
+        attrs.ztrack_failed = sorted(self.failed)
+        attrs.ztrack_stamps = json.dumps(self.stamps, sort_keys=True)
+        self._store.flush()
+        self.n_frames = n_frames
+
+    def close(self):
+        self._store.close()
+
+
+class HDFResultsReader(ResultsReader):
+    """Results in an HDF5 store, written by ``HDFResultsWriter`` or ``DataFrame.to_hdf``.
+
+    Row ranges of table-format keys (as written by ``HDFResultsWriter``) are
+    read without loading the whole table.
+    """
+
+    def __init__(self, path):
+        self._store = pd.HDFStore(path, mode="r")
+        self._columns: Dict[str, pd.Index] = {}
+
+        self._n_frames: Optional[int] = None
+
+        attrs = self._store.root._v_attrs
+
+        if "ztrack_n_frames" in attrs:
+            self._n_frames = int(attrs.ztrack_n_frames)
+            self.failed = list(attrs.ztrack_failed)
+            self.stamps = _read_stamps(attrs)
+        else:
+            self.failed = []
+            self.stamps = {}
+
+    @property
+    def n_frames(self) -> int:
+        if self._n_frames is None:
+            # written in one go, before results were committed chunk by chunk
+            self._n_frames = max(map(self.n_rows, self.keys), default=0)
+
+        return self._n_frames
+
+    @property
+    def keys(self):
+        return [key.lstrip("/") for key in self._store.keys()]
+
+    def columns(self, key: str) -> pd.Index:
+        key = key.lstrip("/")
+
+        if key not in self._columns:
+            self._columns[key] = self._store.select(key, start=0, stop=0).columns
+
+        return self._columns[key]
+
+    def n_rows(self, key: str) -> int:
+        storer = self._store.get_storer(key)
+
+        if storer.is_table:
+            return storer.nrows
+
+        # the length of the index of fixed-format tables, without reading them
+        group = storer.group
+
+        for name in ("axis1", "index"):  # data frames, series
+            if name in group:
+                return group._f_get_child(name).shape[0]
+
+        return len(self._store.select(key).index)
+
+    def reads_row_ranges(self, key: str) -> bool:
+        return self._store.get_storer(key).is_table
+
+    def read(self, key: str, start=None, stop=None, columns=None) -> pd.DataFrame:
+        df = self._store.select(key, start=start, stop=stop)
+
+        if columns is not None:
+            df = df.iloc[:, self._column_indexer(key, columns)]
+
+        return df
+
+    def close(self):
+        self._store.close()
@@ -0,0 +1,178 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from ztrack._settings import (
+    results_block_size,
+    results_cache_blocks,
+    results_read_ahead,
+)
+
+from . import open_results
+
+
+class RowBlocks:
+    """The rows of one table of a results store, read ``block_size`` rows at a time.
+
+    Indexing returns one row as a float array (NaN beyond the end of the
+    table), reading its block if it is not cached. The last ``cache_size``
+    blocks are kept in an LRU cache. Tables that cannot be read by row range
+    are read whole, as a single block.
+    """
+
+    def __init__(self, results: "LazyResults", key: str, *, block_size, cache_size):
+        reader = results.reader
+        self._results = results
+        self._key = key
+        self.columns = reader.columns(key)
+        self._n_rows = reader.n_rows(key)
+
+        # e.g. fixed-format HDF5 tables, which are read whole whatever the range
+        if not reader.reads_row_ranges(key):
+            block_size = max(self._n_rows, 1)
+
+        self._block_size = block_size
+        self._cache_size = cache_size
+        self._blocks: OrderedDict[int, np.ndarray] = OrderedDict()
+        self._nan = np.full(len(self.columns), np.nan)
+
+    def __len__(self):
+        return self._n_rows
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        if not 0 <= i < self._n_rows:
+            return self._nan
+
+        b, j = divmod(i, self._block_size)
+        return self.block(b)[j]
+
+    def block_index(self, i: int) -> int:
+        return i // self._block_size
+
+    def n_blocks(self):
+        return -(-self._n_rows // self._block_size)
+
+    def block(self, b: int) -> np.ndarray:
+        with self._results.lock:
+            block = self._blocks.get(b)
+
+            if block is not None:
+                self._blocks.move_to_end(b)
+                return block
+
+            start = b * self._block_size
+            block = np.asarray(
+                self._results.reader.array(self._key, start, start + self._block_size),
+                dtype=float,
+            )
+            self._blocks[b] = block
+
+            while len(self._blocks) > self._cache_size:
+                self._blocks.popitem(last=False)
+
+            return block
+
+
+class LazyResults:
+    """Results of a video that are read on demand, as they are needed.
+
+    ``rows(key)`` gives per-frame access to a table through a bounded cache of
+    row blocks, and ``results[key]`` reads a whole table (once). Every time a
+    frame is requested with ``request``, a background thread reads up to
+    ``read_ahead`` blocks ahead of it, in the direction the requests have been
+    moving. The store is only ever accessed by one thread at a time.
+    """
+
+    def __init__(
+        self,
+        path,
+        *,
+        block_size=results_block_size,
+        cache_size=results_cache_blocks,
+        read_ahead=results_read_ahead,
+    ):
+        self.reader = open_results(path)
+        self.lock = threading.RLock()
+        self._block_size = block_size
+        self._cache_size = max(cache_size, read_ahead + 1)
+        self._read_ahead = read_ahead
+        self._rows: Dict[str, RowBlocks] = {}
+        self._tables: Dict[str, pd.DataFrame] = {}
+        self._condition = threading.Condition()
+        self._requested: Optional[int] = None
+        self._last_requested = 0
+        self._direction = 1
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __contains__(self, key: str):
+        return key in self.reader
+
+    def __getitem__(self, key: str) -> pd.DataFrame:
+        with self.lock:
+            if key not in self._tables:
+                self._tables[key] = self.reader[key]
+
+            return self._tables[key]
+
+    @property
+    def keys(self):
+        return self.reader.keys
+
+    def rows(self, key: str) -> RowBlocks:
+        with self.lock:
+            if key not in self._rows:
+                self._rows[key] = RowBlocks(
+                    self, key, block_size=self._block_size, cache_size=self._cache_size
+                )
+
+            return self._rows[key]
+
+    def request(self, i: int):
+        with self._condition:
+            if i != self._last_requested:
+                self._direction = 1 if i > self._last_requested else -1
+
+            self._last_requested = i
+            self._requested = i
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        self._thread.join()
+
+        with self.lock:
+            self.reader.close()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._requested is None and not self._closed:
+                    self._condition.wait()
+
+                if self._closed:
+                    return
+
+                i, self._requested = self._requested, None
+                direction = self._direction
+
+            with self.lock:
+                rows = list(self._rows.values())
+
+            for k in range(self._read_ahead + 1):
+                for blocks in rows:
+                    b = blocks.block_index(i) + k * direction
+
+                    if 0 <= b < blocks.n_blocks() and not self._is_interrupted():
+                        blocks.block(b)
+
+    def _is_interrupted(self):
+        with self._condition:
+            return self._closed or self._requested is not None
@@ -9,6 +9,8 @@ from ztrack.utils.variable import Angle, Bool, Float, Int, Point, Rect, UInt8
 
 
 class AdaptiveThresholdEyeTracker(EyeTracker):
+    frame_independent = True
+
     def __init__(
         self, roi=None, params: dict = None, *, verbose=0, debug=False
     ):
@@ -65,8 +67,8 @@ class AdaptiveThresholdEyeTracker(EyeTracker):
     def display_name():
         return "Adaptive threshold"
 
-    def annotate(self, frame: np.ndarray) -> None:
-        super().annotate(frame)
+    def _annotate_preview(self, results) -> None:
+        super()._annotate_preview(results)
 
         p = self.params
 
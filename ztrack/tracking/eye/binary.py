@@ -7,6 +7,8 @@ from ztrack.utils.variable import Bool, Float, UInt8
 
 
 class BinaryEyeTracker(EyeTracker):
+    frame_independent = True
+
     def __init__(
         self, roi=None, params: dict = None, *, verbose=0, debug=False
     ):
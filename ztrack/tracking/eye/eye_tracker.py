@@ -15,6 +15,7 @@ class EyeParams(Params, ABC):
 
 
 class EyeTracker(Tracker, ABC):
+    accepts_gray = True
     _index = pd.MultiIndex.from_product(
         (
             ("left_eye", "right_eye", "swim_bladder"),
@@ -77,6 +78,12 @@ class EyeTracker(Tracker, ABC):
             i.visible = True
             i.cx, i.cy, i.a, i.b, i.theta = j
 
+    def record_layout(self, columns: pd.Index):
+        return self._column_positions(columns, self._index).reshape(3, 5)
+
+    def annotate_from_record(self, record: np.ndarray, layout) -> None:
+        self.annotate_from_results(record[layout])
+
     def annotate_from_series(self, series: pd.Series) -> None:
         ellipse_shapes = [self._left_eye, self._right_eye, self._swim_bladder]
         body_parts = ["left_eye", "right_eye", "swim_bladder"]
@@ -85,6 +92,9 @@ class EyeTracker(Tracker, ABC):
             s = series[j]
             i.cx, i.cy, i.a, i.b, i.theta = s.cx, s.cy, s.a, s.b, s.theta
 
+    def _result_shape(self):
+        return 3, 5
+
     @abstractmethod
     def _track_contours(self, img: np.ndarray):
         pass
@@ -4,12 +4,15 @@ from skimage.util import img_as_ubyte
 
 import ztrack.utils.cv as zcv
 from ztrack.tracking.eye.eye_tracker import EyeParams, EyeTracker
+from ztrack.tracking.eye.segmentation import ThresholdPyramid
 from ztrack.utils.cv import winsorize
 from ztrack.utils.exception import TrackingError
 from ztrack.utils.variable import Angle, Bool, Float, FloatRange, Point, UInt8
 
 
 class EyesOnlyTracker(EyeTracker):
+    frame_independent = True
+
     class __Params(EyeParams):
         def __init__(self, params: dict = None):
             super().__init__(params)
@@ -56,19 +59,24 @@ class EyesOnlyTracker(EyeTracker):
             cv2.imshow("debug", img)
 
         # segment the image with binary threshold
-        contours = self._binary_segmentation(img, p.threshold_segmentation)
+        pyramid = ThresholdPyramid(img, p.threshold_segmentation)
+        contours = pyramid.segmentation.contours
 
         # get the 3 largest contours
         if len(contours) < 2:
             raise TrackingError("Less than 2 contours detected")
 
-        largest2 = sorted(contours, key=cv2.contourArea, reverse=True)[:2]
+        largest2 = sorted(
+            range(len(contours)),
+            key=lambda i: cv2.contourArea(contours[i]),
+            reverse=True,
+        )[:2]
 
         # calculate the contour centers
-        centers = np.array([zcv.contour_center(c) for c in largest2])
+        centers = np.array([zcv.contour_center(contours[i]) for i in largest2])
 
         # sort contours (0: left eye, 1: right eye)
-        centers = centers[self._sort_centers(centers)]
+        order = self._sort_centers(centers)
 
         # apply binary threshold for each body part and get the contour closest to its center
         thresholds = [
@@ -76,14 +84,10 @@ class EyesOnlyTracker(EyeTracker):
             p.threshold_right_eye,
         ]
 
-        results = []
-        for i, (threshold, center) in enumerate(zip(thresholds, centers)):
-            # segment the image with binary threshold of the body part
-            contours = self._binary_segmentation(img, threshold)
-            # get the contour closest to the body part's center
-            results.append(zcv.nearest_contour(contours, tuple(center)))
-
-        return results
+        return [
+            pyramid.nearest_contour(threshold, tuple(centers[i]), largest2[i])
+            for threshold, i in zip(thresholds, order)
+        ]
 
     def _fit_ellipses(self, contours):
         ellipses = np.array([zcv.fit_ellipse_moments(contour) for contour in contours])
@@ -3,11 +3,14 @@ import numpy as np
 
 import ztrack.utils.cv as zcv
 from ztrack.tracking.eye.eye_tracker import EyeParams, EyeTracker
+from ztrack.tracking.eye.segmentation import ThresholdPyramid
 from ztrack.utils.exception import TrackingError
 from ztrack.utils.variable import Bool, Float, UInt8
 
 
 class MultiThresholdEyeTracker(EyeTracker):
+    frame_independent = True
+
     class __Params(EyeParams):
         def __init__(self, params: dict = None):
             super().__init__(params)
@@ -39,19 +42,24 @@ class MultiThresholdEyeTracker(EyeTracker):
         p = self.params
 
         # segment the image with binary threshold
-        contours = self._binary_segmentation(img, p.threshold_segmentation)
+        pyramid = ThresholdPyramid(img, p.threshold_segmentation)
+        contours = pyramid.segmentation.contours
 
         # get the 3 largest contours
         if len(contours) < 3:
             raise TrackingError("Less than 3 contours detected")
 
-        largest3 = sorted(contours, key=cv2.contourArea, reverse=True)[:3]
+        largest3 = sorted(
+            range(len(contours)),
+            key=lambda i: cv2.contourArea(contours[i]),
+            reverse=True,
+        )[:3]
 
         # calculate the contour centers
-        centers = np.array([zcv.contour_center(c) for c in largest3])
+        centers = np.array([zcv.contour_center(contours[i]) for i in largest3])
 
         # sort contours (0: left eye, 1: right eye, 2: swim bladder)
-        centers = centers[list(self._sort_centers(centers))]
+        order = list(self._sort_centers(centers))
 
         # apply binary threshold for each body part and get the contour closest to its center
         thresholds = [
@@ -60,11 +68,7 @@ class MultiThresholdEyeTracker(EyeTracker):
             p.threshold_swim_bladder,
         ]
 
-        results = []
-        for i, (threshold, center) in enumerate(zip(thresholds, centers)):
-            # segment the image with binary threshold of the body part
-            contours = self._binary_segmentation(img, threshold)
-            # get the contour closest to the body part's center
-            results.append(zcv.nearest_contour(contours, tuple(center)))
-
-        return results
+        return [
+            pyramid.nearest_contour(threshold, tuple(centers[i]), largest3[i])
+            for threshold, i in zip(thresholds, order)
+        ]
@@ -0,0 +1,103 @@
+from typing import Dict
+
+import cv2
+import numpy as np
+
+import ztrack.utils.cv as zcv
+
+
+class ContourSet:
+    """Contours with their bounding boxes and (lazily computed) hulls."""
+
+    def __init__(self, contours):
+        self.contours = contours
+        self.rects = [cv2.boundingRect(contour) for contour in contours]
+        self.hulls = [None] * len(contours)
+
+    def __len__(self):
+        return len(self.contours)
+
+    def nearest(self, point):
+        return zcv.nearest_contour_index(self.contours, point, self.rects, self.hulls)
+
+    def distance(self, i, point):
+        if self.hulls[i] is None:
+            self.hulls[i] = cv2.convexHull(self.contours[i])
+        return cv2.pointPolygonTest(self.hulls[i], point, True)
+
+
+class ThresholdPyramid:
+    """Binary segmentations of one image at several thresholds.
+
+    The contours at every threshold are found at most once per image and
+    kept with their bounding boxes and hulls, so body parts that share a
+    threshold share the work. A body part at or above the segmentation
+    threshold is first looked for only inside the segmentation contour it
+    came from (its ``parent``): every pixel above the part's threshold lies
+    in some segmentation contour, and the window is only trusted if no other
+    segmentation contour's hull gets as close to the part's center as the
+    best contour found in it. Results are those of ``zcv.nearest_contour``
+    over the whole image. Small images are always thresholded whole.
+    """
+
+    # below this many pixels, thresholding the whole image is cheaper
+    min_window_image_size = 1 << 16
+
+    def __init__(self, img: np.ndarray, threshold: int):
+        self._img = img
+        self._levels: Dict[int, ContourSet] = {}
+        self.threshold = threshold
+        self.segmentation = self.level(threshold)
+
+    def level(self, threshold: int) -> ContourSet:
+        if threshold not in self._levels:
+            self._levels[threshold] = ContourSet(
+                zcv.find_contours(zcv.binary_threshold(self._img, threshold))
+            )
+        return self._levels[threshold]
+
+    def nearest_contour(self, threshold: int, point, parent=None):
+        if (
+            parent is not None
+            and self._img.size >= self.min_window_image_size
+            and threshold >= self.threshold
+            and threshold not in self._levels
+        ):
+            contour = self._nearest_in_parent(threshold, point, parent)
+
+            if contour is not None:
+                return contour
+
+        level = self.level(threshold)
+        return level.contours[level.nearest(point)[0]]
+
+    def _nearest_in_parent(self, threshold, point, parent):
+        segmentation = self.segmentation
+        x, y, w, h = segmentation.rects[parent]
+        height, width = self._img.shape[:2]
+        x0, y0 = max(x - 1, 0), max(y - 1, 0)
+        x1, y1 = min(x + w + 1, width), min(y + h + 1, height)
+
+        # the parent contour and its holes
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        contours, offset = segmentation.contours, (-x0, -y0)
+        cv2.drawContours(mask, contours, parent, 255, cv2.FILLED, offset=offset)
+        cv2.drawContours(mask, contours, parent, 255, 1, offset=offset)
+
+        binary = zcv.binary_threshold(self._img[y0:y1, x0:x1], threshold)
+        cv2.bitwise_and(binary, mask, dst=binary)
+        contours = cv2.findContours(
+            binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE, offset=(x0, y0)
+        )[0]
+
+        if len(contours) == 0:
+            return None
+
+        i, distance = ContourSet(contours).nearest(point)
+
+        for j, rect in enumerate(segmentation.rects):
+            if j != parent and zcv.rect_distance(rect, point) + 1e-6 >= distance:
+                if segmentation.distance(j, point) >= distance:
+                    return None
+
+        return contours[i]
@@ -1,10 +1,11 @@
 from abc import ABC, abstractmethod
-from pathlib import Path
+from typing import Optional, Tuple
 
 import cv2
 import numpy as np
 import pandas as pd
 
+import ztrack.utils.cv as zcv
 from ztrack.tracking.eye.multi_threshold import MultiThresholdEyeTracker
 from ztrack.tracking.mixins.background import BackgroundSubtractionMixin
 from ztrack.utils.exception import TrackingError
@@ -12,7 +13,7 @@ from ztrack.utils.shape import Points
 
 
 class BaseFreeSwimTracker(
-    MultiThresholdEyeTracker, BackgroundSubtractionMixin, ABC
+    BackgroundSubtractionMixin, MultiThresholdEyeTracker, ABC
 ):
     @property
     def shapes(self):
@@ -33,17 +34,22 @@ class BaseFreeSwimTracker(
         self._is_bg_bright = False
         self._video_path = None
         self._points = Points(np.array([[0, 0]]), 1, "m", symbol="+")
+        # (x0, y0, x1, y1) window of the ROI predicted from the last frame
+        self._crop: Optional[Tuple[int, int, int, int]] = None
 
-    def set_video(self, video_path):
-        self._bg = None
-        self._video_path = video_path
+    @property
+    def frame_independent(self):
+        # with the adaptive crop, every frame is tracked in a window that
+        # depends on the previous frame
+        return self.params.crop_margin == 0
 
-        if video_path is not None:
-            bg_path = Path(video_path).with_suffix(".png")
+    def set_video(self, video_path):
+        super().set_video(video_path)
+        self._crop = None
 
-            if bg_path.exists():
-                self._bg = cv2.imread(str(bg_path), 0)
-                self._is_bg_bright = cv2.mean(self._bg)[0] > 127
+    def _preview(self, frame: np.ndarray):
+        self._crop = None
+        return super()._preview(frame)
 
     @classmethod
     def _results_to_series(cls, results):
@@ -59,6 +65,35 @@ class BaseFreeSwimTracker(
 
         return s
 
+    def annotate_from_results(self, a) -> None:
+        eye, tail = a
+        super().annotate_from_results(eye)
+        self._annotate_tail(tail)
+
+    def record_layout(self, columns: pd.Index):
+        if "point00" not in columns.get_level_values(0):
+            return super().record_layout(columns), None
+
+        idx = pd.MultiIndex.from_product(
+            (
+                (f"point{i:02d}" for i in range(self.params.n_points)),
+                ("x", "y"),
+            )
+        )
+        tail = self._column_positions(columns, idx).reshape(-1, 2)
+        return super().record_layout(columns), tail
+
+    def annotate_from_record(self, record: np.ndarray, layout) -> None:
+        eye, tail = layout
+        super().annotate_from_results(record[eye])
+        self._annotate_tail(None if tail is None else record[tail])
+
+    def _annotate_tail(self, tail):
+        self._points.visible = tail is not None
+
+        if tail is not None:
+            self._points.data = tail
+
     def annotate_from_series(self, series: pd.Series) -> None:
         super().annotate_from_series(series)
 
@@ -70,29 +105,147 @@ class BaseFreeSwimTracker(
         else:
             self._points.visible = False
 
-    def _transform_from_roi_to_frame(self, results):
+    def _result_shape(self):
+        # 3 ellipses followed by the tail points, see _pack_results
+        return (15 + 2 * self.params.n_points,)
+
+    def _pack_results(self, results):
         eye, tail = results
-        eye = super()._transform_from_roi_to_frame(eye)
+        packed = np.full(self._result_shape(), np.nan)
+        packed[:15] = eye.ravel()
+
+        if tail is not None:
+            packed[15:] = np.ravel(tail)
 
+        return packed
+
+    @classmethod
+    def _results_to_dataframe(cls, results):
+        n_frames = len(results)
+        df_eye = super()._results_to_dataframe(
+            results[:, :15].reshape(n_frames, 3, 5)
+        )
+        n_points = (results.shape[1] - 15) // 2
+        idx = pd.MultiIndex.from_product(
+            ((f"point{i:02d}" for i in range(n_points)), ("x", "y"))
+        )
+        df_tail = pd.DataFrame(results[:, 15:], columns=idx)
+
+        return pd.concat([df_eye, df_tail], axis=1)
+
+    def _transform_from_roi_to_frame(self, results):
         if self.roi.value is not None:
             x0, y0 = self.roi.value[:2]
-            tail += (x0, y0)
+            results[:, [0, 5, 10]] += x0
+            results[:, [1, 6, 11]] += y0
+            results[:, 15::2] += x0
+            results[:, 16::2] += y0
 
-        return eye, tail
+        return results
 
     @abstractmethod
     def _track_tail(self, src, point, angle):
         pass
 
     def _track_img(self, img: np.ndarray):
-        if self._bg is None:
-            self._is_bg_bright, self._bg = self.calculate_background(
-                self._video_path
-            )
+        self.ensure_background()
 
-        img = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+        img = zcv.rgb2gray(img)
         bg = self._bg[self.roi.to_slice()]
+        results = None
+
+        if self._crop is not None:
+            try:
+                results = self._track_window(img, bg, self._crop)
+            except Exception:
+                pass  # lost the fish, look for it in the whole ROI
 
+        if results is None:
+            self._crop = None
+            results = self._track_window(img, bg)
+
+        if self.params.crop_margin > 0:
+            self._crop = self._predict_crop(*results, img.shape)
+
+        return results
+
+    def _track_window(self, img, bg, window=None):
+        if window is None:
+            ellipses, tail, _ = self._track_fish(img, bg)
+            return ellipses, tail
+
+        x0, y0, x1, y1 = window
+        ellipses, tail, contours = self._track_fish(
+            img[y0:y1, x0:x1], bg[y0:y1, x0:x1]
+        )
+
+        if tail is None:
+            raise TrackingError("Lost the tail in the crop window")
+
+        # a fish cut by the window is tracked again in the whole ROI
+        h, w = img.shape
+        cut = (x0 > 0, y0 > 0, x1 < w, y1 < h)
+        points = [np.reshape(contour, (-1, 2)) for contour in contours]
+
+        if any(
+            self._touches_edges(p, (x1 - x0, y1 - y0), cut)
+            for p in points + [tail]
+        ):
+            raise TrackingError("The fish touches the crop window edge")
+
+        ellipses[:, :2] += (x0, y0)
+        return ellipses, tail + (x0, y0)
+
+    @staticmethod
+    def _touches_edges(points, size, edges, tolerance=2):
+        # edges: whether the left, top, right and bottom edges are cut
+        w, h = size
+        x, y = points[:, 0], points[:, 1]
+        left, top, right, bottom = edges
+        return bool(
+            (left and (x < tolerance).any())
+            or (top and (y < tolerance).any())
+            or (right and (x >= w - 1 - tolerance).any())
+            or (bottom and (y >= h - 1 - tolerance).any())
+        )
+
+    def _tail_reach(self, tail, sb_posterior):
+        # how far the tail can be from the swim bladder in the next frame
+        return np.linalg.norm(tail - sb_posterior, axis=1).max()
+
+    def _predict_crop(self, ellipses, tail, shape):
+        # without a tail to go by, the next frame is tracked in the whole ROI
+        if tail is None:
+            return None
+
+        # window around the ellipses and the circle the tail can reach,
+        # whichever way it bends, plus the margin
+        sb_posterior = self._sb_posterior(ellipses)
+        reach = self._tail_reach(tail, sb_posterior)
+        radii = ellipses[:, 2:4].max(1, keepdims=True)
+        lo = np.row_stack((ellipses[:, :2] - radii, sb_posterior - reach))
+        hi = np.row_stack((ellipses[:, :2] + radii, sb_posterior + reach))
+
+        if not (np.isfinite(lo).all() and np.isfinite(hi).all()):
+            return None
+
+        h, w = shape
+        m = self.params.crop_margin
+        x0, y0 = np.floor(lo.min(0)).astype(int) - m
+        x1, y1 = np.ceil(hi.max(0)).astype(int) + m + 1
+
+        return max(0, x0), max(0, y0), min(w, x1), min(h, y1)
+
+    @staticmethod
+    def _sb_posterior(ellipses):
+        sb_center = ellipses[2, :2]
+        sb_theta = np.deg2rad(ellipses[2, -1])
+        return np.round(
+            sb_center
+            - ellipses[2, 2] * np.array([np.cos(sb_theta), np.sin(sb_theta)])
+        ).astype(int)
+
+    def _track_fish(self, img, bg):
         if self._is_bg_bright:
             img = cv2.subtract(bg, img)
         else:
@@ -102,19 +255,14 @@ class BaseFreeSwimTracker(
         ellipses = self._fit_ellipses(contours)
 
         centers = ellipses[:, :2]
-        sb_center = centers[2]
         midpoint = centers[:2].mean(0)
-        midline = sb_center - midpoint
+        midline = centers[2] - midpoint
         opp_heading = np.arctan2(*midline[::-1])
-        sb_theta = np.deg2rad(ellipses[2, -1])
-        sb_posterior = np.round(
-            sb_center
-            - ellipses[2, 2] * np.array([np.cos(sb_theta), np.sin(sb_theta)])
-        ).astype(int)
+        sb_posterior = self._sb_posterior(ellipses)
 
         try:
             tail = self._track_tail(img, sb_posterior, opp_heading)
         except TrackingError:
             tail = None
 
-        return ellipses, tail
+        return ellipses, tail, contours
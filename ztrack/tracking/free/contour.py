@@ -23,6 +23,7 @@ class ContourFreeSwimTracker(BaseFreeSwimTracker):
             self.threshold_right_eye = UInt8("Right eye threshold", 70)
             self.threshold_swim_bladder = UInt8("Swim bladder threshold", 70)
             self.n_points = Int("Number of points", 51, 2, 100)
+            self.crop_margin = Int("Adaptive crop margin (px)", 0, 0, 1000)
 
     def __init__(
         self, roi=None, params: dict = None, *, verbose=0, debug=False
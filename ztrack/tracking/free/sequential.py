@@ -2,6 +2,7 @@ import numpy as np
 
 import ztrack.utils.cv as zcv
 from ztrack.tracking.params import Params
+from ztrack.utils.exception import TrackingError
 from ztrack.utils.variable import Angle, Float, Int, UInt8
 
 from .base import BaseFreeSwimTracker
@@ -19,6 +20,7 @@ class SequentialFreeSwimTracker(BaseFreeSwimTracker):
             self.threshold_swim_bladder = UInt8("Swim bladder threshold", 70)
             self.n_steps = Int("Number of steps", 20, 3, 20)
             self.n_points = Int("Number of points", 51, 2, 100)
+            self.crop_margin = Int("Adaptive crop margin (px)", 0, 0, 1000)
             self.length = Int("Tail length (px)", 90, 0, 1000)
             self.theta = Angle("Search angle (°)", 60)
 
@@ -34,12 +36,18 @@ class SequentialFreeSwimTracker(BaseFreeSwimTracker):
     def display_name():
         return "Sequential"
 
+    def _tail_reach(self, tail, sb_posterior):
+        return self.params.length
+
     def _track_tail(self, src, point, angle):
         p = self.params
         theta = np.deg2rad(p.theta / 2)
         img = zcv.gaussian_blur(src, p.sigma_tail)
         tail = zcv.sequential_track_tail(
-            img, point, angle, theta, p.n_steps, p.length, p.n_points
+            img, point, angle, theta, p.n_steps, p.length, ""
         )
 
-        return tail
+        if (tail < 0).any():
+            raise TrackingError("Tail tracking stopped early")
+
+        return zcv.interpolate_tail(tail, p.n_points)
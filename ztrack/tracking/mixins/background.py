@@ -4,7 +4,9 @@ from typing import Optional
 import cv2
 import numpy as np
 
-import ztrack.utils.cv as zcv
+from ztrack._settings import background_override_extension
+from ztrack.utils.background import video_median
+from ztrack.utils.cache import ArrayCache
 
 
 class BackgroundSubtractionMixin:
@@ -12,13 +14,64 @@ class BackgroundSubtractionMixin:
     _bg: Optional[np.ndarray]
     _video_path: Optional[str]
     _is_bg_bright: bool
+    # one of ztrack.utils.background.methods
+    _bg_method = "partition"
+    _bg_n_frames = 300
+
+    def set_video(self, video_path):
+        super().set_video(video_path)  # type: ignore
+        self._bg = None
+        self._video_path = video_path
+
+        if video_path is not None:
+            bg = self._read_background_override(video_path)
+
+            if bg is None:
+                bg = self._bg_cache().get(self._bg_key(video_path))
+
+            if bg is not None:
+                self._is_bg_bright, self._bg = self._is_bright(bg), bg
 
     def calculate_background(self, video_path):
-        if self._verbose:
-            print("Calculating background...")
+        bg = self._read_background_override(video_path)
+
+        if bg is not None:
+            return self._is_bright(bg), bg
+
+        cache = self._bg_cache()
+        key = self._bg_key(video_path)
+        bg = cache.get(key)
+
+        if bg is None:
+            if self._verbose:
+                print("Calculating background...")
+
+            bg = video_median(
+                video_path, self._bg_n_frames, verbose=self._verbose, method=self._bg_method
+            )
+            cache.put(key, bg)
+
+        return self._is_bright(bg), bg
+
+    def ensure_background(self):
+        if self._bg is None:
+            self._is_bg_bright, self._bg = self.calculate_background(self._video_path)
+
+    def _bg_key(self, video_path):
+        return ArrayCache.key(video_path, n_frames=self._bg_n_frames, method=self._bg_method)
+
+    @staticmethod
+    def _read_background_override(video_path) -> Optional[np.ndarray]:
+        # a background made for the video by hand is used as is. The <video>.png
+        # that older versions saved for every video is not, since it is not
+        # known which video and settings it was computed from
+        bg_path = Path(video_path).with_suffix(background_override_extension)
+        return cv2.imread(str(bg_path), 0) if bg_path.exists() else None
 
-        bg = zcv.video_median(video_path, verbose=self._verbose)
-        cv2.imwrite(str(Path(video_path).with_suffix(".png")), bg)
-        is_bg_bright = cv2.mean(bg)[0] > 127
+    @staticmethod
+    def _bg_cache():
+        return ArrayCache("background")
 
-        return is_bg_bright, bg
+    @staticmethod
+    def _is_bright(bg):
+        return cv2.mean(bg)[0] > 127
@@ -1,4 +1,3 @@
-from pathlib import Path
 from typing import Type
 
 import cv2
@@ -14,7 +13,10 @@ from ..params import Params
 from ..tracker import Tracker
 
 
-class ParameciaTracker(Tracker, BackgroundSubtractionMixin):
+class ParameciaTracker(BackgroundSubtractionMixin, Tracker):
+    frame_independent = True
+    accepts_gray = True
+
     class __Params(Params):
         def __init__(self, params: dict = None):
             super().__init__(params=params)
@@ -46,6 +48,17 @@ class ParameciaTracker(Tracker, BackgroundSubtractionMixin):
         self._points.visible = True
         self._points.data = centers
 
+    def annotate_from_results(self, a: np.ndarray) -> None:
+        self._points.visible = True
+        self._points.data = np.reshape(a, (-1, 2))
+
+    def record_layout(self, columns: pd.Index):
+        return None
+
+    def annotate_from_record(self, record: np.ndarray, layout) -> None:
+        self._points.visible = True
+        self._points.data = record.reshape(-1, 2)
+
     @staticmethod
     def name():
         return "paramecia"
@@ -59,17 +72,6 @@ class ParameciaTracker(Tracker, BackgroundSubtractionMixin):
         row = results.ravel()
         return pd.Series(row)
 
-    def set_video(self, video_path):
-        self._bg = None
-        self._video_path = video_path
-
-        if video_path is not None:
-            bg_path = Path(video_path).with_suffix(".png")
-
-            if bg_path.exists():
-                self._bg = cv2.imread(str(bg_path), 0)
-                self._is_bg_bright = cv2.mean(self._bg)[0] > 127
-
     def _transform_from_roi_to_frame(self, results: np.ndarray):
         if self.roi.value is not None:
             x0, y0 = self.roi.value[:2]
@@ -77,12 +79,9 @@ class ParameciaTracker(Tracker, BackgroundSubtractionMixin):
         return results
 
     def _track_img(self, img: np.ndarray):
-        if self._bg is None:
-            self._is_bg_bright, self._bg = self.calculate_background(
-                self._video_path
-            )
+        self.ensure_background()
 
-        img = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+        img = zcv.rgb2gray(img)
         bg = self._bg[self.roi.to_slice()]
 
         if self._is_bg_bright:
@@ -0,0 +1,279 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from ztrack._settings import commit_interval, decode_batch_size
+from ztrack.utils.exception import VideoTrackingError
+from ztrack.utils.video import FrameSource
+
+from .mixins.background import BackgroundSubtractionMixin
+from .tracker import Tracker
+
+
+class TrackingPipeline:
+    """Run several trackers over a video while decoding every frame only once.
+
+    Frames are decoded sequentially in batches of ``batch_size`` into a reused
+    buffer and every tracker gets a view of its own ROI of the whole batch
+    (see ``Tracker.batched``). If all trackers accept grayscale input, frames
+    are cropped to the union of the ROIs and converted to gray once, at decode
+    time. A tracker that fails is dropped from the pass
+    (its error is kept in ``errors``) and the remaining trackers carry on.
+
+    With ``jobs > 1`` and only frame-independent trackers, the frame range is
+    split into chunks that are tracked in worker processes, each with its own
+    decoder, and the results are stitched back together in frame order.
+
+    Results are written into preallocated per-tracker buffers as frames are
+    processed. If ``memmap_dir`` is given, these are memory-mapped ``.npy``
+    files in that directory, which must outlive the returned data frames.
+    Given a ``writer``, results are instead appended to it and committed chunk
+    by chunk (see ``HDFResultsWriter``), and tracking can start at any frame.
+    """
+
+    def __init__(
+        self,
+        trackers: Dict[str, Tracker],
+        *,
+        ignore_errors=False,
+        verbose=0,
+        batch_size=decode_batch_size,
+        jobs=1,
+        memmap_dir=None,
+    ):
+        self._trackers = trackers
+        self._batch_size = batch_size
+        self._ignore_errors = ignore_errors
+        self._verbose = verbose
+        self._jobs = jobs
+        self._memmap_dir = memmap_dir
+        self.errors: Dict[str, VideoTrackingError] = {}
+
+    @property
+    def is_parallel(self):
+        return self._jobs > 1 and all(
+            tracker.frame_independent for tracker in self._trackers.values()
+        )
+
+    def track_video(self, video_path, writer=None, start=0) -> Dict[str, pd.DataFrame]:
+        self.errors = {}
+
+        for tracker in self._trackers.values():
+            tracker.set_video(video_path)
+
+        n_frames = len(FrameSource(video_path))
+        memmap = self._memmap_dir is not None
+        buffers = None
+
+        if writer is None and not self.is_parallel:
+            # a single pass that writes straight into the final buffers
+            chunk_size = max(n_frames, 1)
+        elif self.is_parallel:
+            chunk_size = max(self._batch_size, math.ceil(n_frames / (self._jobs * 4)))
+        else:
+            chunk_size = commit_interval
+
+        bounds = [(i, min(i + chunk_size, n_frames)) for i in range(start, n_frames, chunk_size)]
+
+        # several chunks are gathered in one buffer, and a video without frames
+        # still gives (empty) results
+        if writer is None and len(bounds) != 1:
+            buffers = self._create_buffers(start, n_frames, memmap)
+
+        progress = tqdm(total=n_frames - start) if self._verbose else None
+
+        for (lo, hi), (chunk_buffers, chunk_errors) in zip(
+            bounds, self._track_chunks(video_path, bounds, memmap and buffers is None, progress)
+        ):
+            if buffers is None and writer is None:
+                buffers = chunk_buffers
+
+            for key in self._trackers:
+                if key in self.errors:
+                    continue
+
+                if key in chunk_errors:
+                    self.errors[key] = chunk_errors[key]
+
+                    if writer is not None:
+                        writer.remove(key)
+                elif writer is not None:
+                    df = chunk_buffers[key].to_dataframe()
+                    df.index = pd.RangeIndex(lo, hi)
+                    writer.append(key, df)
+                elif buffers is not chunk_buffers:
+                    buffers[key].update(chunk_buffers[key])
+
+            if writer is not None:
+                writer.commit(hi)
+
+        if progress is not None:
+            progress.close()
+
+        if writer is not None or buffers is None:
+            return {}
+
+        return {
+            key: buffers[key].to_dataframe() for key in self._trackers if key not in self.errors
+        }
+
+    def _track_chunks(self, video_path, bounds, memmap=False, progress=None):
+        if not self.is_parallel:
+            # chunks are tracked in order by the same trackers, so any state
+            # the trackers keep between frames carries over
+            for start, stop in bounds:
+                yield self._track_range(video_path, start, stop, progress, memmap)
+            return
+
+        # compute anything shared between chunks (e.g. the background) once, up front
+        for tracker in self._trackers.values():
+            if isinstance(tracker, BackgroundSubtractionMixin):
+                tracker.ensure_background()
+
+        with ProcessPoolExecutor(max_workers=self._jobs) as executor:
+            futures = [
+                executor.submit(self._track_range, video_path, start, stop)
+                for start, stop in bounds
+            ]
+
+            # hand the chunks back in frame order
+            for future, (start, stop) in zip(futures, bounds):
+                result = future.result()
+
+                for key, buffer in result[0].items():
+                    buffer._tracker = self._trackers[key]
+
+                if progress is not None:
+                    progress.update(stop - start)
+
+                yield result
+
+    def _create_buffers(self, start, stop, memmap=False):
+        return {
+            key: _ResultBuffer(
+                tracker,
+                start,
+                stop,
+                os.path.join(self._memmap_dir, f"{key}.npy") if memmap else None,
+            )
+            for key, tracker in self._trackers.items()
+        }
+
+    def _track_range(self, video_path, start, stop, progress=None, memmap=False):
+        # trackers that failed in an earlier chunk are not run again
+        active = {key: t for key, t in self._trackers.items() if key not in self.errors}
+        errors: Dict[str, VideoTrackingError] = {}
+
+        gray = all(tracker.accepts_gray for tracker in active.values())
+        roi = self._union_roi() if gray else None
+        slices = {key: self._roi_slice(tracker, roi, axis=1) for key, tracker in active.items()}
+
+        source = FrameSource(
+            video_path,
+            batch_size=self._batch_size,
+            start=start,
+            stop=stop,
+            gray=gray,
+            roi=roi,
+        )
+        buffers = self._create_buffers(source.start, source.stop, memmap)
+
+        for i, frames in source.batches():
+            if not active:
+                break
+
+            for key, tracker in list(active.items()):
+                try:
+                    results = tracker._track_roi_batch(frames[slices[key]], i, self._ignore_errors)
+                except VideoTrackingError as e:
+                    errors[key] = e
+                    del active[key]
+                    continue
+
+                for j, result in enumerate(results):
+                    buffers[key].set(i + j, result)
+
+            if progress is not None:
+                progress.update(len(frames))
+
+        return buffers, errors
+
+    def _union_roi(self):
+        rois = [tracker.roi.value for tracker in self._trackers.values()]
+
+        if not rois or any(roi is None for roi in rois):
+            return None
+
+        x0 = min(x for x, _, _, _ in rois)
+        y0 = min(y for _, y, _, _ in rois)
+        x1 = max(x + w for x, _, w, _ in rois)
+        y1 = max(y + h for _, y, _, h in rois)
+        return x0, y0, x1 - x0, y1 - y0
+
+    @staticmethod
+    def _roi_slice(tracker: Tracker, roi=None, axis=0):
+        # slice of the tracker's ROI within frames that were already cropped to `roi`
+        if roi is None or tracker.roi.value is None:
+            return tracker.roi.to_slice(axis)
+
+        x, y, w, h = tracker.roi.value
+        x -= roi[0]
+        y -= roi[1]
+        return (np.s_[:],) * axis + np.s_[y : y + h, x : x + w]
+
+
+class _ResultBuffer:
+    """Results of one tracker for the frames ``[start, stop)``.
+
+    Trackers with a fixed result shape are written into a preallocated float
+    array (optionally memory-mapped), in which frames that failed stay NaN.
+    Other trackers fall back to collecting a list.
+    """
+
+    def __init__(self, tracker: Tracker, start: int, stop: int, path=None):
+        self._tracker = tracker
+        self._start = start
+        self._list: List = []
+        self._array: Optional[np.ndarray] = None
+
+        shape = tracker._result_shape()
+
+        if shape is not None:
+            shape = (stop - start, *shape)
+
+            if path is None:
+                self._array = np.full(shape, np.nan)
+            else:
+                self._array = np.lib.format.open_memmap(
+                    path, mode="w+", dtype=np.float64, shape=shape
+                )
+                self._array[:] = np.nan
+
+    def __getstate__(self):
+        # only the results travel back from worker processes
+        state = self.__dict__.copy()
+        del state["_tracker"]
+        return state
+
+    def set(self, i: int, results):
+        if self._array is None:
+            self._list.append(results)
+        elif results is not np.nan:
+            self._array[i - self._start] = self._tracker._pack_results(results)
+
+    def update(self, other: "_ResultBuffer"):
+        if self._array is None:
+            self._list.extend(other._list)
+        else:
+            i = other._start - self._start
+            self._array[i : i + len(other._array)] = other._array
+
+    def to_dataframe(self) -> pd.DataFrame:
+        if self._array is None:
+            return self._tracker._results_from_list(self._list)
+        return self._tracker._results_from_array(self._array)
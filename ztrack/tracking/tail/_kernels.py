@@ -0,0 +1,319 @@
+"""Segment walks of the line-scan tail trackers (sequential2, gradient2, com).
+
+Starting at the tail base, every segment samples the image along a line
+perpendicular to the current direction, picks a point on it and steps
+towards it. The walks are implemented twice with the same signatures: a pure
+NumPy reference and a numba version that runs the whole walk (or a whole
+batch of frames) in one compiled call. ``get_kernels`` picks one by name.
+"""
+import logging
+from functools import lru_cache
+from types import SimpleNamespace
+
+import numpy as np
+from scipy.ndimage import correlate1d
+from scipy.ndimage._filters import _gaussian_kernel1d  # noqa
+
+from ztrack.utils.math import split_int
+
+backends = ("auto", "numpy", "numba")
+
+
+def segment_geometry(tail_length, n_segments, w1, w2):
+    segment_lengths = split_int(tail_length, n_segments)
+    half_lengths = (
+        w1 + (w2 - w1) * np.cumsum((0, *segment_lengths[1:])) / segment_lengths[1:].sum()
+    )
+    lengths = (half_lengths * 2).astype(int)
+    return segment_lengths, half_lengths, lengths
+
+
+def gaussian_weights(sigma, order=0):
+    lw = int(4.0 * float(sigma) + 0.5)
+    return _gaussian_kernel1d(sigma, order, lw)[::-1].copy()
+
+
+def _scan_line(x, y, angle, r, half_length):
+    sin = np.sin(angle)
+    cos = np.cos(angle)
+    x0 = x + r * cos - half_length * sin
+    x1 = x + r * cos + half_length * sin
+    y0 = y + r * sin + half_length * cos
+    y1 = y + r * sin - half_length * cos
+    return x0, x1, y0, y1
+
+
+def peak_walk(img, x, y, angle, segment_lengths, half_lengths, lengths, weights):
+    # step towards the brightest point of the smoothed scan line
+    h, w = img.shape
+    n_segments = len(segment_lengths)
+    results = np.empty((n_segments, 2), dtype=np.int16)
+
+    for i in range(n_segments):
+        r = segment_lengths[i]
+        x0, x1, y0, y1 = _scan_line(x, y, angle, r, half_lengths[i])
+
+        if min(x0, x1, y0, y1) >= 0 and max(x0, x1) < w and max(y0, y1) < h:
+            x_ = np.linspace(x0, x1, lengths[i]).astype(int)
+            y_ = np.linspace(y0, y1, lengths[i]).astype(int)
+            z = correlate1d(img[y_, x_].astype(float), weights, 0, mode="nearest", origin=0)
+            argmax = z.argmax()
+            dx = x_[argmax] - x
+            dy = y_[argmax] - y
+            s = np.sqrt(dx * dx + dy * dy)
+            x = x + dx / s * r
+            y = y + dy / s * r
+            results[i] = x, y
+        else:
+            results[i:] = -1
+
+    return results
+
+
+def gradient_walk(img, x, y, angle, segment_lengths, half_lengths, lengths, weights):
+    # step towards the middle of the rising and falling edges of the scan line
+    h, w = img.shape
+    n_segments = len(segment_lengths)
+    results = np.empty((n_segments, 2), dtype=np.int16)
+
+    for i in range(n_segments):
+        r = segment_lengths[i]
+        x0, x1, y0, y1 = _scan_line(x, y, angle, r, half_lengths[i])
+
+        if min(x0, x1, y0, y1) >= 0 and max(x0, x1) < w and max(y0, y1) < h:
+            x_ = np.linspace(x0, x1, lengths[i]).astype(int)
+            y_ = np.linspace(y0, y1, lengths[i]).astype(int)
+            z = correlate1d(img[y_, x_].astype(float), weights, 0, mode="nearest", origin=0)
+            m = lengths[i] // 2
+            argmax = (z[:m].argmax() + m + z[m:].argmin()) // 2
+            angle = np.arctan2(y_[argmax] - y, x_[argmax] - x)
+            x += round(r * np.cos(angle))
+            y += round(r * np.sin(angle))
+            results[i] = x, y
+        else:
+            results[i:] = -1
+
+    return results
+
+
+def com_walk(img, x, y, angle, segment_lengths, half_lengths, lengths, q):
+    # step towards the center of mass of the scan line above its q-quantile
+    h, w = img.shape
+    n_segments = len(segment_lengths)
+    results = np.empty((n_segments, 2), dtype=np.int16)
+
+    for i in range(n_segments):
+        r = segment_lengths[i]
+        x0, x1, y0, y1 = _scan_line(x, y, angle, r, half_lengths[i])
+
+        if min(x0, x1, y0, y1) >= 0 and max(x0, x1) < w and max(y0, y1) < h:
+            x_ = np.linspace(x0, x1, lengths[i]).astype(int)
+            y_ = np.linspace(y0, y1, lengths[i]).astype(int)
+            z = img[y_, x_].astype(float)
+            z = np.maximum(0, z - np.quantile(z, q))
+            z = z / z.sum()
+            dx = x_ @ z - x
+            dy = y_ @ z - y
+            s = np.sqrt(dx * dx + dy * dy)
+            x = x + dx / s * r
+            y = y + dy / s * r
+            results[i] = x, y
+        else:
+            results[i:] = -1
+
+    return results
+
+
+def _batch(walk):
+    def walk_batch(imgs, x, y, angle, segment_lengths, half_lengths, lengths, arg):
+        return np.array(
+            [walk(img, x, y, angle, segment_lengths, half_lengths, lengths, arg) for img in imgs]
+        ).reshape(len(imgs), len(segment_lengths), 2)
+
+    return walk_batch
+
+
+numpy_kernels = SimpleNamespace(
+    peak_walk=peak_walk,
+    gradient_walk=gradient_walk,
+    com_walk=com_walk,
+    peak_walk_batch=_batch(peak_walk),
+    gradient_walk_batch=_batch(gradient_walk),
+    com_walk_batch=_batch(com_walk),
+)
+
+
+@lru_cache(maxsize=None)
+def _numba_kernels():
+    import numba
+
+    jit = numba.njit(cache=True, error_model="numpy")
+
+    scan_line = jit(_scan_line)
+
+    @jit
+    def scan(img, x, y, angle, r, half_length, length, x_, y_, z):
+        # fill x_, y_ and z with the scan line, as in the NumPy walks
+        h, w = img.shape
+        x0, x1, y0, y1 = scan_line(x, y, angle, r, half_length)
+
+        if min(x0, x1, y0, y1) < 0 or max(x0, x1) >= w or max(y0, y1) >= h:
+            return False
+
+        xs = np.linspace(x0, x1, length)
+        ys = np.linspace(y0, y1, length)
+
+        for j in range(length):
+            x_[j] = int(xs[j])
+            y_[j] = int(ys[j])
+            z[j] = img[y_[j], x_[j]]
+
+        return True
+
+    @jit
+    def smooth(z, length, weights, out):
+        # correlate1d(z, weights, mode="nearest", origin=0)
+        size = len(weights)
+        center = size // 2
+
+        for j in range(length):
+            acc = 0.0
+
+            for k in range(size):
+                idx = min(max(j + k - center, 0), length - 1)
+                acc += weights[k] * z[idx]
+
+            out[j] = acc
+
+    @jit
+    def peak_walk(img, x, y, angle, segment_lengths, half_lengths, lengths, weights):
+        n_segments = len(segment_lengths)
+        results = np.empty((n_segments, 2), dtype=np.int16)
+        n = max(lengths.max(), 1)
+        x_ = np.empty(n, np.int64)
+        y_ = np.empty(n, np.int64)
+        z = np.empty(n)
+        zs = np.empty(n)
+        x = float(x)
+        y = float(y)
+
+        for i in range(n_segments):
+            r = segment_lengths[i]
+            length = lengths[i]
+
+            if not scan(img, x, y, angle, r, half_lengths[i], length, x_, y_, z):
+                results[i:] = -1
+                continue
+
+            smooth(z, length, weights, zs)
+            argmax = zs[:length].argmax()
+            dx = x_[argmax] - x
+            dy = y_[argmax] - y
+            s = np.sqrt(dx * dx + dy * dy)
+            x = x + dx / s * r
+            y = y + dy / s * r
+            results[i, 0] = x
+            results[i, 1] = y
+
+        return results
+
+    @jit
+    def gradient_walk(img, x, y, angle, segment_lengths, half_lengths, lengths, weights):
+        n_segments = len(segment_lengths)
+        results = np.empty((n_segments, 2), dtype=np.int16)
+        n = max(lengths.max(), 1)
+        x_ = np.empty(n, np.int64)
+        y_ = np.empty(n, np.int64)
+        z = np.empty(n)
+        zs = np.empty(n)
+
+        for i in range(n_segments):
+            r = segment_lengths[i]
+            length = lengths[i]
+
+            if not scan(img, x, y, angle, r, half_lengths[i], length, x_, y_, z):
+                results[i:] = -1
+                continue
+
+            smooth(z, length, weights, zs)
+            m = length // 2
+            argmax = (zs[:m].argmax() + m + zs[m:length].argmin()) // 2
+            angle = np.arctan2(y_[argmax] - y, x_[argmax] - x)
+            x += round(r * np.cos(angle))
+            y += round(r * np.sin(angle))
+            results[i, 0] = x
+            results[i, 1] = y
+
+        return results
+
+    @jit
+    def com_walk(img, x, y, angle, segment_lengths, half_lengths, lengths, q):
+        n_segments = len(segment_lengths)
+        results = np.empty((n_segments, 2), dtype=np.int16)
+        n = max(lengths.max(), 1)
+        x_ = np.empty(n, np.int64)
+        y_ = np.empty(n, np.int64)
+        z = np.empty(n)
+        x = float(x)
+        y = float(y)
+
+        for i in range(n_segments):
+            r = segment_lengths[i]
+            length = lengths[i]
+
+            if not scan(img, x, y, angle, r, half_lengths[i], length, x_, y_, z):
+                results[i:] = -1
+                continue
+
+            zq = np.maximum(0, z[:length] - np.quantile(z[:length], q))
+            zq = zq / zq.sum()
+            dx = (x_[:length] * zq).sum() - x
+            dy = (y_[:length] * zq).sum() - y
+            s = np.sqrt(dx * dx + dy * dy)
+            x = x + dx / s * r
+            y = y + dy / s * r
+            results[i, 0] = x
+            results[i, 1] = y
+
+        return results
+
+    def batch(walk):
+        @numba.njit(cache=True, error_model="numpy", parallel=True)
+        def walk_batch(imgs, x, y, angle, segment_lengths, half_lengths, lengths, arg):
+            results = np.empty((len(imgs), len(segment_lengths), 2), dtype=np.int16)
+
+            for i in numba.prange(len(imgs)):
+                results[i] = walk(
+                    imgs[i], x, y, angle, segment_lengths, half_lengths, lengths, arg
+                )
+
+            return results
+
+        return walk_batch
+
+    return SimpleNamespace(
+        peak_walk=peak_walk,
+        gradient_walk=gradient_walk,
+        com_walk=com_walk,
+        peak_walk_batch=batch(peak_walk),
+        gradient_walk_batch=batch(gradient_walk),
+        com_walk_batch=batch(com_walk),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_kernels(backend="auto"):
+    """Kernels of ``backend``, falling back to NumPy if numba is not installed."""
+    if backend not in backends:
+        raise ValueError(f"Unknown kernel backend {backend!r}, expected one of {backends}")
+
+    if backend == "numpy":
+        return numpy_kernels
+
+    try:
+        return _numba_kernels()
+    except ImportError:
+        if backend == "numba":
+            logging.warning("numba is not installed, using the NumPy tail kernels instead")
+
+        return numpy_kernels
@@ -2,75 +2,20 @@ from typing import Type
 
 import numpy as np
 import pandas as pd
-from scipy.ndimage._filters import _gaussian_kernel1d, correlate1d  # noqa
 
 import ztrack.utils.cv as zcv
 from ztrack.tracking.tracker import Params, Tracker
-from ztrack.utils.math import split_int
 from ztrack.utils.shape import Line, Points
-from ztrack.utils.variable import Angle, Bool, Float, Int, Point
+from ztrack.utils.variable import Angle, Bool, Choice, Float, Int, Point
 
-
-def _track_img(
-    img: np.ndarray,
-    h,
-    w,
-    angle_rad,
-    tail_base,
-    sigma,
-    invert,
-    n_segments,
-    segment_lenths,
-    half_lengths,
-    lengths,
-    weights,
-    roi=None,
-):
-    x, y = tail_base
-
-    if roi is not None:
-        x0, y0 = roi[:2]
-        x -= x0
-        y -= y0
-
-    if invert:
-        img = zcv.rgb2gray_dark_bg_blur(img, sigma, invert)
-
-    results = np.empty((n_segments, 2), dtype=np.int16)
-
-    for i in range(n_segments):
-        sin = np.sin(angle_rad)
-        cos = np.cos(angle_rad)
-
-        r = segment_lenths[i]
-        half_length = half_lengths[i]
-        length = lengths[i]
-        x0 = x + (r_cos := r * cos) - (l_sin := half_length * sin)
-        x1 = x + r_cos + l_sin
-        y0 = y + (r_sin := r * sin) + (l_cos := half_length * cos)
-        y1 = y + r_sin - l_cos
-
-        if min(x0, x1, y0, y1) >= 0 and max(x0, x1) < w and max(y0, y1) < h:
-            x_ = np.linspace(x0, x1, length).astype(int)
-            y_ = np.linspace(y0, y1, length).astype(int)
-
-            z = img[y_, x_]
-            z = correlate1d(
-                z.astype(float), weights, 0, mode="nearest", origin=0
-            )
-            m = length // 2
-            argmax = (z[:m].argmax() + m + z[m:].argmin()) // 2
-            angle_rad = np.arctan2(y_[argmax] - y, x_[argmax] - x)
-            x += round(r * np.cos(angle_rad))
-            y += round(r * np.sin(angle_rad))
-            results[i] = x, y
-        else:
-            results[i:] = -1
-
-    return results
+from ._kernels import backends, get_kernels, segment_geometry
 
 
 class ComTailTracker(Tracker):
+    frame_independent = True
+    accepts_gray = True
+    batched = True
+
     @property
     def _Params(self) -> Type[Params]:
         return self.__Params
@@ -103,6 +48,7 @@ class ComTailTracker(Tracker):
             self.w2 = Int("Tail end width (px)", 30, 5, 100)
             self.quantile = Float("sigma tail", 0, 0, 1, 0.01)
             self.invert = Bool("invert", True)
+            self.backend = Choice("Kernel backend", "auto", backends)
 
     def __init__(
         self,
@@ -117,7 +63,13 @@ class ComTailTracker(Tracker):
         self._line1 = Line(0, 0, 0, 0, 1, "m")
         self._line2 = Line(0, 0, 0, 0, 1, "m")
 
+    def _result_shape(self):
+        return self.params.n_segments, 2
+
     def _track_img(self, img: np.ndarray):
+        return self._track_imgs(img[None])[0]
+
+    def _track_imgs(self, imgs: np.ndarray):
         p = self.params
 
         x, y = p.tail_base
@@ -126,59 +78,12 @@ class ComTailTracker(Tracker):
             x -= x0
             y -= y0
 
-        angle = np.deg2rad(p.angle)
-        if p.invert:
-            img = zcv.rgb2gray_dark_bg_blur(img, p.sigma, p.invert)
+        imgs = np.stack([zcv.rgb2gray_dark_bg_blur(img, p.sigma, p.invert) for img in imgs])
+        geometry = segment_geometry(p.tail_length, p.n_segments, p.w1, p.w2)
 
-        h, w = img.shape
-        n_segments = p.n_segments
-        results = np.empty((n_segments, 2), dtype=np.int16)
-
-        segment_lengths = split_int(p.tail_length, n_segments)
-        w1 = p.w1
-        w2 = p.w2
-        half_lengths = (
-            w1
-            + (w2 - w1)
-            * np.cumsum((0, *segment_lengths[1:]))
-            / segment_lengths[1:].sum()
+        return get_kernels(p.backend).com_walk_batch(
+            imgs, x, y, np.deg2rad(p.angle), *geometry, p.quantile
         )
-        lengths = (half_lengths * 2).astype(int)
-        q = p.quantile
-
-        for i in range(n_segments):
-            r = segment_lengths[i]
-            sin = np.sin(angle)
-            cos = np.cos(angle)
-
-            half_length = half_lengths[i]
-            length = lengths[i]
-            x0 = x + (r_cos := r * cos) - (l_sin := half_length * sin)
-            x1 = x + r_cos + l_sin
-            y0 = y + (r_sin := r * sin) + (l_cos := half_length * cos)
-            y1 = y + r_sin - l_cos
-
-            if min(x0, x1, y0, y1) >= 0 and max(x0, x1, y0, y1) < w:
-                x_ = np.linspace(x0, x1, length).astype(int)
-                y_ = np.linspace(y0, y1, length).astype(int)
-
-                z = img[y_, x_]
-                z = np.maximum(0, z - np.quantile(z, q))
-                z = z / z.sum()
-                xn = x_ @ z
-                yn = y_ @ z
-
-                dx = xn - x
-                dy = yn - y
-                s = np.sqrt(dx * dx + dy * dy)
-                x = x + dx / s * r
-                y = y + dy / s * r
-
-                results[i] = x, y
-            else:
-                results[i:] = -1
-
-        return results
 
     @staticmethod
     def name():
@@ -212,66 +117,3 @@ class ComTailTracker(Tracker):
             ((f"point{i:02d}" for i in range(n_points)), ("x", "y"))
         )
         return pd.DataFrame(results.reshape(len(results), -1), columns=idx)
-
-    def track_video(self, video_path, ignore_errors=False):
-        from decord import VideoReader
-        from tqdm import tqdm
-
-        self.set_video(video_path)
-
-        video_reader = VideoReader(str(video_path))
-
-        p = self.params
-        h, w = video_reader[0].shape[:2]
-        angle_rad = np.deg2rad(p.angle)
-        tail_base = p.tail_base
-        sigma = p.sigma
-        invert = p.invert
-        n_segments = p.n_segments
-
-        segment_lengths = split_int(p.tail_length, n_segments)
-        half_lengths = (
-            p.w1
-            + (p.w2 - p.w1)
-            * np.cumsum((0, *segment_lengths[1:]))
-            / segment_lengths[1:].sum()
-        )
-        lengths = (half_lengths * 2).astype(int)
-        sigma_tail = p.sigma_tail
-        roi = self.roi.value
-
-        it = (
-            tqdm(range(len(video_reader)))
-            if self._verbose
-            else range(len(video_reader))
-        )
-
-        s_ = self.roi.to_slice()
-
-        lw = int(4.0 * float(sigma_tail) + 0.5)
-        weights = _gaussian_kernel1d(sigma_tail, 1, lw)[::-1]
-
-        data = np.asarray(
-            [
-                _track_img(
-                    video_reader[i].asnumpy()[s_],
-                    h,
-                    w,
-                    angle_rad,
-                    tail_base,
-                    sigma,
-                    invert,
-                    n_segments,
-                    segment_lengths,
-                    half_lengths,
-                    lengths,
-                    weights,
-                    roi,
-                )
-                for i in it
-            ]
-        )
-
-        return self._results_to_dataframe(
-            self._transform_from_roi_to_frame(data)
-        )
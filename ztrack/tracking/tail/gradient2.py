@@ -2,71 +2,20 @@ from typing import Type
 
 import numpy as np
 import pandas as pd
-from scipy.ndimage._filters import _gaussian_kernel1d, correlate1d  # noqa
 
 import ztrack.utils.cv as zcv
 from ztrack.tracking.tracker import Params, Tracker
-from ztrack.utils.math import split_int
 from ztrack.utils.shape import Line, Points
-from ztrack.utils.variable import Angle, Bool, Float, Int, Point
+from ztrack.utils.variable import Angle, Bool, Choice, Float, Int, Point
 
-
-def _track_img(
-    img: np.ndarray,
-    angle_rad,
-    tail_base,
-    sigma,
-    invert,
-    n_segments,
-    segment_lengths,
-    half_lengths,
-    lengths,
-    weights,
-    roi=None,
-):
-    x, y = tail_base
-
-    if roi is not None:
-        x0, y0 = roi[:2]
-        x -= x0
-        y -= y0
-
-    img = zcv.rgb2gray_dark_bg_blur(img, sigma, invert)
-
-    h, w = img.shape
-
-    results = np.empty((n_segments, 2), dtype=np.int16)
-
-    for i in range(n_segments):
-        sin = np.sin(angle_rad)
-        cos = np.cos(angle_rad)
-
-        r = segment_lengths[i]
-        half_length = half_lengths[i]
-        length = lengths[i]
-        x0 = x + (r_cos := r * cos) - (l_sin := half_length * sin)
-        x1 = x + r_cos + l_sin
-        y0 = y + (r_sin := r * sin) + (l_cos := half_length * cos)
-        y1 = y + r_sin - l_cos
-
-        if min(x0, x1, y0, y1) >= 0 and max(x0, x1) < w and max(y0, y1) < h:
-            x_ = np.linspace(x0, x1, length).astype(int)
-            y_ = np.linspace(y0, y1, length).astype(int)
-            z = img[y_, x_]
-            z = correlate1d(z.astype(float), weights, 0, mode="nearest", origin=0)
-            m = length // 2
-            argmax = (z[:m].argmax() + m + z[m:].argmin()) // 2
-            angle_rad = np.arctan2(y_[argmax] - y, x_[argmax] - x)
-            x += round(r * np.cos(angle_rad))
-            y += round(r * np.sin(angle_rad))
-            results[i] = x, y
-        else:
-            results[i:] = -1
-
-    return results
+from ._kernels import backends, gaussian_weights, get_kernels, segment_geometry
 
 
 class GradientTailTracker2(Tracker):
+    frame_independent = True
+    accepts_gray = True
+    batched = True
+
     @property
     def _Params(self) -> Type[Params]:
         return self.__Params
@@ -99,6 +48,7 @@ class GradientTailTracker2(Tracker):
             self.w2 = Int("Tail end width (px)", 30, 5, 100)
             self.sigma_tail = Float("sigma tail", 1, 0, 10, 0.1)
             self.invert = Bool("invert", True)
+            self.backend = Choice("Kernel backend", "auto", backends)
 
     def __init__(
         self,
@@ -113,7 +63,13 @@ class GradientTailTracker2(Tracker):
         self._line1 = Line(0, 0, 0, 0, 1, "m")
         self._line2 = Line(0, 0, 0, 0, 1, "m")
 
+    def _result_shape(self):
+        return self.params.n_segments, 2
+
     def _track_img(self, img: np.ndarray):
+        return self._track_imgs(img[None])[0]
+
+    def _track_imgs(self, imgs: np.ndarray):
         p = self.params
 
         x, y = p.tail_base
@@ -122,55 +78,12 @@ class GradientTailTracker2(Tracker):
             x -= x0
             y -= y0
 
-        angle = np.deg2rad(p.angle)
-
-        img = zcv.rgb2gray_dark_bg_blur(img, p.sigma, p.invert)
-
-        h, w = img.shape
-        n_segments = p.n_segments
-        results = np.empty((n_segments, 2), dtype=np.int16)
+        imgs = np.stack([zcv.rgb2gray_dark_bg_blur(img, p.sigma, p.invert) for img in imgs])
+        geometry = segment_geometry(p.tail_length, p.n_segments, p.w1, p.w2)
 
-        segment_lengths = split_int(p.tail_length, n_segments)
-        w1 = p.w1
-        w2 = p.w2
-        half_lengths = (
-            w1 + (w2 - w1) * np.cumsum((0, *segment_lengths[1:])) / segment_lengths[1:].sum()
+        return get_kernels(p.backend).gradient_walk_batch(
+            imgs, x, y, np.deg2rad(p.angle), *geometry, gaussian_weights(p.sigma_tail, 1)
         )
-        lengths = (half_lengths * 2).astype(int)
-        sigma_tail = p.sigma_tail
-
-        for i in range(n_segments):
-            r = segment_lengths[i]
-            sin = np.sin(angle)
-            cos = np.cos(angle)
-
-            half_length = half_lengths[i]
-            length = lengths[i]
-            x0 = x + (r_cos := r * cos) - (l_sin := half_length * sin)
-            x1 = x + r_cos + l_sin
-            y0 = y + (r_sin := r * sin) + (l_cos := half_length * cos)
-            y1 = y + r_sin - l_cos
-
-            if min(x0, x1, y0, y1) >= 0 and max(x0, x1, y0, y1) < w:
-                x_ = np.linspace(x0, x1, length).astype(int)
-                y_ = np.linspace(y0, y1, length).astype(int)
-
-                z = img[y_, x_]
-
-                lw = int(4.0 * float(sigma_tail) + 0.5)
-                weights = _gaussian_kernel1d(sigma_tail, 1, lw)[::-1]
-                z = correlate1d(z.astype(float), weights, 0, mode="nearest", origin=0)
-
-                m = length // 2
-                argmax = (z[:m].argmax() + m + z[m:].argmin()) // 2
-                angle = np.arctan2(y_[argmax] - y, x_[argmax] - x)
-                x += round(r * np.cos(angle))
-                y += round(r * np.sin(angle))
-                results[i] = x, y
-            else:
-                results[i:] = -1
-
-        return results
 
     @staticmethod
     def name():
@@ -202,55 +115,3 @@ class GradientTailTracker2(Tracker):
         n_points = results.shape[-2]
         idx = pd.MultiIndex.from_product(((f"point{i:02d}" for i in range(n_points)), ("x", "y")))
         return pd.DataFrame(results.reshape(len(results), -1), columns=idx)
-
-    def track_video(self, video_path, ignore_errors=False):
-        from decord import VideoReader
-        from tqdm import tqdm
-
-        self.set_video(video_path)
-
-        video_reader = VideoReader(str(video_path))
-
-        p = self.params
-        h, w = video_reader[0].shape[:2]
-        angle_rad = np.deg2rad(p.angle)
-        tail_base = p.tail_base
-        sigma = p.sigma
-        invert = p.invert
-        n_segments = p.n_segments
-
-        segment_lengths = split_int(p.tail_length, n_segments)
-        half_lengths = (
-            p.w1 + (p.w2 - p.w1) * np.cumsum((0, *segment_lengths[1:])) / segment_lengths[1:].sum()
-        )
-        lengths = (half_lengths * 2).astype(int)
-        sigma_tail = p.sigma_tail
-        roi = self.roi.value
-
-        it = tqdm(range(len(video_reader))) if self._verbose else range(len(video_reader))
-
-        s_ = self.roi.to_slice()
-
-        lw = int(4.0 * float(sigma_tail) + 0.5)
-        weights = _gaussian_kernel1d(sigma_tail, 1, lw)[::-1]
-
-        data = np.asarray(
-            [
-                _track_img(
-                    video_reader[i].asnumpy()[s_],
-                    angle_rad,
-                    tail_base,
-                    sigma,
-                    invert,
-                    n_segments,
-                    segment_lengths,
-                    half_lengths,
-                    lengths,
-                    weights,
-                    roi,
-                )
-                for i in it
-            ]
-        )
-
-        return self._results_to_dataframe(self._transform_from_roi_to_frame(data))
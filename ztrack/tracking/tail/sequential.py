@@ -8,6 +8,10 @@ from .tail_tracker import TailParams, TailTracker
 
 
 class SequentialTailTracker(TailTracker):
+    frame_independent = True
+    accepts_gray = True
+    batched = True
+
     class __Params(TailParams):
         def __init__(self, params: dict = None):
             super().__init__(params)
@@ -27,7 +31,10 @@ class SequentialTailTracker(TailTracker):
     def _Params(self):
         return self.__Params
 
-    def _track_tail(self, img):
+    def _result_shape(self):
+        return self.params.n_steps + 1, 2
+
+    def _search_args(self):
         p = self.params
 
         x, y = p.tail_base
@@ -39,17 +46,19 @@ class SequentialTailTracker(TailTracker):
 
         angle = np.deg2rad(p.angle)
         theta = np.deg2rad(p.theta / 2)
-        img = zcv.rgb2gray_dark_bg_blur(img, p.sigma, p.invert)
-
-        return zcv.sequential_track_tail(
-            img,
-            point,
-            angle,
-            theta,
-            p.n_steps,
-            p.length,
-            p.skips,
-        )
+
+        return point, angle, theta, p.n_steps, p.length, p.skips
+
+    def _preprocess(self, img):
+        p = self.params
+        return zcv.rgb2gray_dark_bg_blur(img, p.sigma, p.invert)
+
+    def _track_tail(self, img):
+        return zcv.sequential_track_tail(self._preprocess(img), *self._search_args())
+
+    def _track_imgs(self, imgs):
+        imgs = np.stack([self._preprocess(img) for img in imgs])
+        return zcv.sequential_track_tail_batch(imgs, *self._search_args())
 
     @staticmethod
     def name():
@@ -3,12 +3,23 @@ import numpy as np
 import ztrack.utils.cv as zcv
 from ztrack.utils.variable import Angle, Bool, Float, Int, Point, String
 from skimage.filters import sato
-import cv2
 
 from .tail_tracker import TailParams, TailTracker
 
 
+def _sato_margin(sigma):
+    # reach of the Hessian in skimage's sato: two Gaussian derivative passes of
+    # sigma / sqrt(2), truncated at 8 (100 for sigma <= 1) standard deviations,
+    # plus two pixels for the finite differences used by older versions
+    truncate = 8 if sigma > 1 else 100
+    return 2 * int(truncate * sigma / np.sqrt(2) + 0.5) + 2
+
+
 class SequentialSatoTailTracker(TailTracker):
+    frame_independent = True
+    accepts_gray = True
+    batched = True
+
     class __Params(TailParams):
         def __init__(self, params: dict = None):
             super().__init__(params)
@@ -28,7 +39,10 @@ class SequentialSatoTailTracker(TailTracker):
     def _Params(self):
         return self.__Params
 
-    def _track_tail(self, img):
+    def _result_shape(self):
+        return self.params.n_steps + 1, 2
+
+    def _search_args(self):
         p = self.params
 
         x, y = p.tail_base
@@ -40,19 +54,43 @@ class SequentialSatoTailTracker(TailTracker):
 
         angle = np.deg2rad(p.angle)
         theta = np.deg2rad(p.theta / 2)
+
+        return point, angle, theta, p.n_steps, p.length, p.skips
+
+    def _sato_region(self, shape):
+        # the part of the image the tail search can reach, and the part of the
+        # image the ridge filter needs to compute it exactly there
+        h, w = shape
+        x0, y0, x1, y1 = zcv.sequential_tail_bbox(*self._search_args())
+        x0, y0 = max(0, int(np.floor(x0))), max(0, int(np.floor(y0)))
+        x1, y1 = min(w, int(np.floor(x1)) + 1), min(h, int(np.floor(y1)) + 1)
+        m = _sato_margin(self.params.sigma)
+        outer = np.s_[max(0, y0 - m) : min(h, y1 + m), max(0, x0 - m) : min(w, x1 + m)]
+        inner = np.s_[y0:y1, x0:x1]
+        return outer, inner
+
+    def _preprocess(self, img):
+        p = self.params
         # img = zcv.rgb2gray_dark_bg_blur(img, 0, False)
-        img = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
-        img = sato(img, [p.sigma], black_ridges=p.black_tail, mode="reflect")
-
-        return zcv.sequential_track_tail(
-            img,
-            point,
-            angle,
-            theta,
-            p.n_steps,
-            p.length,
-            p.skips,
-        )
+        img = zcv.rgb2gray(img)
+        outer, inner = self._sato_region(img.shape)
+        out = np.zeros(img.shape)
+
+        if out[inner].size > 0:
+            ridges = sato(img[outer], [p.sigma], black_ridges=p.black_tail, mode="reflect")
+            y0, x0 = outer[0].start, outer[1].start
+            out[inner] = ridges[
+                inner[0].start - y0 : inner[0].stop - y0, inner[1].start - x0 : inner[1].stop - x0
+            ]
+
+        return out
+
+    def _track_tail(self, img):
+        return zcv.sequential_track_tail(self._preprocess(img), *self._search_args())
+
+    def _track_imgs(self, imgs):
+        imgs = np.stack([self._preprocess(img) for img in imgs])
+        return zcv.sequential_track_tail_batch(imgs, *self._search_args())
 
     @staticmethod
     def name():
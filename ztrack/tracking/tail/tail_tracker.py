@@ -68,6 +68,13 @@ class TailTracker(Tracker, ABC):
         self._points.visible = True
         self._points.data = a
 
+    def record_layout(self, columns: pd.Index):
+        return None
+
+    def annotate_from_record(self, record: np.ndarray, layout) -> None:
+        self._points.visible = True
+        self._points.data = record.reshape(-1, 2)
+
     def _transform_from_roi_to_frame(self, results: np.ndarray):
         if self.roi.value is not None:
             x0, y0 = self.roi.value[:2]
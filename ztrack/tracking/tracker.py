@@ -1,14 +1,12 @@
 import logging
 import traceback
 from abc import ABC, abstractmethod
-from typing import Type
+from typing import Optional, Tuple, Type
 
 import numpy as np
 import pandas as pd
-from decord import VideoReader
-from tqdm import tqdm
 
-from ztrack.utils.exception import TrackingError
+from ztrack.utils.exception import VideoTrackingError
 from ztrack.utils.variable import Rect
 
 from .params import Params
@@ -17,12 +15,32 @@ from .params import Params
 class Tracker(ABC):
     _index: pd.Index
 
+    # whether _track_img depends on nothing but the current frame, so that
+    # chunks of a video can be tracked independently and in any order
+    frame_independent = False
+    # whether _track_img also accepts single-channel (grayscale) images
+    accepts_gray = False
+    # whether _track_imgs tracks a stack of images faster than one at a time
+    batched = False
+
     def __init__(self, roi=None, params: dict = None, *, verbose=0, debug=False):
         self._debug = debug
         self._roi = Rect("", roi)
         self._params = self._Params(params)
         self._verbose = verbose
 
+    def __getstate__(self):
+        # the Params classes are private nested classes and cannot be pickled by
+        # reference, so send the parameter values to worker processes instead
+        state = self.__dict__.copy()
+        state["_params"] = self._params.to_dict()
+        return state
+
+    def __setstate__(self, state):
+        params = state.pop("_params")
+        self.__dict__.update(state)
+        self._params = self._Params(params)
+
     def __repr__(self):
         return f"{self.__class__.__name__}(roi={self._roi.value}, params={self.params.to_dict()})"
 
@@ -49,8 +67,24 @@ class Tracker(ABC):
 
     def annotate(self, frame: np.ndarray) -> None:
         try:
-            img = self._get_bbox_img(frame)
-            self.annotate_from_results(self._track_img(img))
+            results = self._preview(frame)
+        except Exception as e:
+            results = e
+
+        self._annotate_preview(results)
+
+    def _preview(self, frame: np.ndarray):
+        # the part of annotate that does not touch the shapes, and can therefore
+        # run outside the GUI thread
+        return self._track_img(self._get_bbox_img(frame))
+
+    def _annotate_preview(self, results) -> None:
+        # results of _preview, or the exception it raised
+        try:
+            if isinstance(results, Exception):
+                raise results
+
+            self.annotate_from_results(results)
         except Exception:
             print(traceback.format_exc())
             for shape in self.shapes:
@@ -64,6 +98,30 @@ class Tracker(ABC):
         if a is not None:
             return self.annotate_from_series(self._results_to_dataframe(a[None]).iloc[0])
 
+    def record_layout(self, columns: pd.Index):
+        # whatever annotate_from_record needs to read rows of a results data frame
+        # with these columns, computed once per data frame rather than per frame
+        return columns
+
+    def annotate_from_record(self, record: np.ndarray, layout) -> None:
+        """Annotate from one row of a results data frame, as a float array.
+
+        ``layout`` is ``record_layout(columns)``. Trackers override both to read
+        the row by position instead of building a Series for it.
+        """
+        self.annotate_from_series(pd.Series(record, layout))
+
+    @staticmethod
+    def _column_positions(columns: pd.Index, labels: pd.Index) -> np.ndarray:
+        # as when indexing a Series, missing columns (e.g. results of another
+        # tracker or number of points) are an error rather than read as -1
+        positions = columns.get_indexer(labels)
+
+        if (positions < 0).any():
+            raise KeyError(f"Not in the results: {list(labels[positions < 0])}")
+
+        return positions
+
     @property
     def params(self) -> Params:
         return self._params
@@ -98,35 +156,91 @@ class Tracker(ABC):
     def _track_img(self, img: np.ndarray):
         pass
 
-    def __track_img(self, img: np.ndarray, i: int, ignore_error=False):
+    def _track_roi_img(self, img: np.ndarray, i: int, ignore_errors=False):
         try:
             return self._track_img(img)
         except Exception:
-            if ignore_error:
+            if ignore_errors:
                 logging.error(f"Tracker {self.name()} failed at frame {i}")
                 return np.nan
-            raise TrackingError(i)
+            raise VideoTrackingError(i)
 
-    def track_video(self, video_path, ignore_errors=False):
-        self.set_video(video_path)
+    def _track_imgs(self, imgs: np.ndarray):
+        return [self._track_img(img) for img in imgs]
 
-        video_reader = VideoReader(str(video_path))
-        it = tqdm(range(len(video_reader))) if self._verbose else range(len(video_reader))
+    def _track_roi_batch(self, imgs: np.ndarray, start: int, ignore_errors=False) -> list:
+        if self.batched:
+            try:
+                return list(self._track_imgs(imgs))
+            except Exception:
+                pass  # track the frames one by one to find the ones that failed
 
-        s_ = self.roi.to_slice()
-        data = np.asarray(
-            np.broadcast_arrays(
-                *[self.__track_img(video_reader[i].asnumpy()[s_], i, ignore_errors) for i in it]
-            )
-        )
+        return [self._track_roi_img(img, start + j, ignore_errors) for j, img in enumerate(imgs)]
+
+    def _result_shape(self) -> Optional[Tuple[int, ...]]:
+        # shape of the (packed) results of one frame, if it is the same for every frame
+        return None
+
+    def _pack_results(self, results) -> np.ndarray:
+        return results
+
+    def _results_from_list(self, data: list) -> pd.DataFrame:
+        data = np.asarray(np.broadcast_arrays(*data))
+        return self._results_to_dataframe(self._transform_from_roi_to_frame(data))
+
+    def _results_from_array(self, data: np.ndarray) -> pd.DataFrame:
+        if len(data) == 0:
+            # no frames, the columns are those of the results of a failed frame
+            nan = np.full((1, *data.shape[1:]), np.nan)
+            return self._results_to_dataframe(nan).iloc[:0]
 
         return self._results_to_dataframe(self._transform_from_roi_to_frame(data))
 
+    def track_video(self, video_path, ignore_errors=False, jobs=1):
+        from .pipeline import TrackingPipeline
+
+        pipeline = TrackingPipeline(
+            {self.name(): self}, ignore_errors=ignore_errors, verbose=self._verbose, jobs=jobs
+        )
+        dfs = pipeline.track_video(video_path)
+
+        if self.name() in pipeline.errors:
+            raise pipeline.errors[self.name()]
+
+        return dfs[self.name()]
+
     def set_video(self, video_path):
         pass
 
 
+class ResultRecords:
+    """The results of a tracker as float rows, one per frame.
+
+    Used to annotate frames one at a time (e.g. while scrubbing through a
+    video), which is much faster than indexing the data frame for every frame.
+    ``values`` is a 2-D array, or anything else that returns the row of a
+    frame when indexed (e.g. ``ztrack.results.lazy.RowBlocks``).
+    """
+
+    def __init__(self, tracker: Tracker, df: pd.DataFrame = None, *, values=None, columns=None):
+        if df is not None:
+            values, columns = df.to_numpy(dtype=float), df.columns
+
+        self._tracker = tracker
+        self.values = values
+        self.layout = tracker.record_layout(columns)
+
+    def __len__(self):
+        return len(self.values)
+
+    def annotate(self, i: int) -> None:
+        self._tracker.annotate_from_record(self.values[i], self.layout)
+
+
 class NoneTracker(Tracker):
+    frame_independent = True
+    accepts_gray = True
+
     class __Params(Params):
         pass
 
@@ -0,0 +1,173 @@
+import itertools
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+from tqdm import tqdm
+
+from ztrack._settings import decode_batch_size
+
+from .video import FrameSource
+
+methods = ("partition", "histogram", "running")
+
+
+def sample_indices(n_frames: int, n_samples: int) -> np.ndarray:
+    n_samples = min(n_frames, n_samples)
+    return np.linspace(0, n_frames - 1, n_samples).astype(int)
+
+
+def sample_frames(
+    video_path,
+    n_samples=300,
+    *,
+    sequential=False,
+    batch_size=decode_batch_size,
+    verbose=False,
+) -> Iterator[np.ndarray]:
+    """Yield ``n_samples`` evenly spaced grayscale frames of a video.
+
+    By default only the sampled frames are requested from the decoder. With
+    ``sequential=True`` the whole video is decoded in order and the sampled
+    frames are picked out, which avoids seeking and can be faster for short
+    videos or videos with long keyframe intervals. Frames are only valid until
+    the next one is yielded.
+    """
+    source = FrameSource(video_path, batch_size=batch_size, gray=True)
+    idx = sample_indices(len(source), n_samples)
+
+    if sequential:
+        keep = set(idx.tolist())
+        it = (frame for i, frame in source if i in keep)
+    else:
+        it = (frame for _, frame in source.frames_at(idx))
+
+    yield from tqdm(it, total=len(idx)) if verbose else it
+
+
+def stack_frames(frames: Iterable[np.ndarray], n_frames: int) -> np.ndarray:
+    # one preallocated uint8 array instead of a list of arrays
+    stack: Optional[np.ndarray] = None
+    n = 0
+
+    for frame in frames:
+        if stack is None:
+            stack = np.empty((n_frames, *frame.shape), dtype=np.uint8)
+
+        stack[n] = frame
+        n += 1
+
+    return stack[:n]
+
+
+def partition_median(stack: np.ndarray, block_size=1 << 14) -> np.ndarray:
+    """Exact per-pixel median of a uint8 stack of shape (n, h, w).
+
+    Equal to ``np.median(stack, axis=0).astype(np.uint8)``, but partially
+    sorts blocks of pixels of the stack in place instead of a float copy.
+    """
+    n = len(stack)
+    lo, hi = (n - 1) // 2, n // 2
+    pixels = stack.reshape(n, -1)
+    median = np.empty(pixels.shape[1], dtype=np.uint8)
+
+    for i in range(0, len(median), block_size):
+        block = pixels[:, i : i + block_size]
+        block.partition((lo, hi), axis=0)
+        median[i : i + block_size] = (block[lo].astype(np.uint16) + block[hi]) // 2
+
+    return median.reshape(stack.shape[1:])
+
+
+def histogram_median(stack: np.ndarray, block_size=1 << 14) -> np.ndarray:
+    """Exact per-pixel median of a uint8 stack of shape (n, h, w).
+
+    Counts the values of every pixel in a block and reads the median off the
+    cumulative histogram, which takes linear time in the number of frames.
+    """
+    n = len(stack)
+    lo, hi = (n - 1) // 2, n // 2
+    pixels = stack.reshape(n, -1)
+    median = np.empty(pixels.shape[1], dtype=np.uint8)
+
+    for i in range(0, len(median), block_size):
+        block = pixels[:, i : i + block_size]
+        n_pixels = block.shape[1]
+        counts = np.bincount(
+            (block + np.arange(0, n_pixels * 256, 256)).ravel(), minlength=n_pixels * 256
+        )
+        cumsum = counts.reshape(n_pixels, 256).cumsum(axis=1)
+        # the value of rank k is the first one with more than k values at or below it
+        a = (cumsum <= lo).sum(axis=1)
+        b = (cumsum <= hi).sum(axis=1)
+        median[i : i + block_size] = (a + b) // 2
+
+    return median.reshape(stack.shape[1:])
+
+
+def running_percentile(frames: Iterable[np.ndarray], q=0.5, warmup=16) -> np.ndarray:
+    """Streaming estimate of the per-pixel ``q`` quantile of ``frames``.
+
+    The estimate starts from the exact quantile of the first ``warmup`` frames.
+    After that, every frame moves it towards the frame, up by ``q * step`` or
+    down by ``(1 - q) * step``, never past the frame itself. The step of a
+    pixel grows while it keeps moving in the same direction and is reset when
+    the direction changes (the "Frugal-2U" scheme), so only a few arrays the
+    size of a frame are kept in memory.
+    """
+    frames = iter(frames)
+    first = stack_frames(itertools.islice(frames, warmup), warmup)
+
+    if len(first) == 0:
+        raise ValueError("No frames to estimate the background from")
+
+    estimate = np.quantile(first, q, axis=0).astype(np.float32)
+    step = np.ones_like(estimate)
+    direction = np.zeros(estimate.shape, dtype=np.int8)
+    del first
+
+    for frame in frames:
+        new_direction = np.sign(frame - estimate).astype(np.int8)
+        step = np.where((new_direction == direction) & (new_direction != 0), step + 1, 1)
+        direction = new_direction
+        up = np.minimum(estimate + q * step, frame)
+        down = np.maximum(estimate - (1 - q) * step, frame)
+        estimate = np.where(direction > 0, up, np.where(direction < 0, down, estimate))
+
+    return np.clip(np.rint(estimate), 0, 255).astype(np.uint8)
+
+
+def video_median(
+    video_path,
+    n_frames_for_bg=300,
+    verbose=False,
+    *,
+    method="partition",
+    sequential=False,
+    batch_size=decode_batch_size,
+    block_size=1 << 14,
+) -> np.ndarray:
+    """Median of ``n_frames_for_bg`` evenly spaced grayscale frames.
+
+    ``method`` is one of "partition" and "histogram" (exact) or "running"
+    (approximate, only keeps one frame in memory).
+    """
+    if method not in methods:
+        raise ValueError(f"Unknown background method {method!r}, expected one of {methods}")
+
+    frames = sample_frames(
+        video_path,
+        n_frames_for_bg,
+        sequential=sequential,
+        batch_size=batch_size,
+        verbose=verbose,
+    )
+
+    if method == "running":
+        return running_percentile(frames)
+
+    stack = stack_frames(frames, n_frames_for_bg)
+
+    if method == "histogram":
+        return histogram_median(stack, block_size)
+
+    return partition_median(stack, block_size)
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from ztrack._settings import background_cache_size, cache_dir_env
+
+from .file import video_fingerprint
+
+
+def get_cache_dir() -> Path:
+    if os.environ.get(cache_dir_env):
+        return Path(os.environ[cache_dir_env])
+    return Path.home() / ".cache" / "ztrack"
+
+
+class ArrayCache:
+    """Arrays computed from videos, stored as ``.npy`` files in a cache directory.
+
+    Entries are keyed by the fingerprint of the video and the parameters used
+    to compute them, so they are shared between trackers and processes and go
+    stale when the video changes. Files are written atomically, and the least
+    recently used entries are evicted once there are more than ``max_entries``.
+    Failing to read or write the cache is never an error.
+    """
+
+    def __init__(self, name: str, directory=None, max_entries=background_cache_size):
+        self._directory = Path(get_cache_dir() if directory is None else directory) / name
+        self._max_entries = max_entries
+
+    @staticmethod
+    def key(video_path, **params) -> str:
+        data = json.dumps([video_fingerprint(video_path), params], sort_keys=True)
+        return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self._directory / f"{key}.npy"
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        path = self._path(key)
+
+        try:
+            array = np.load(path)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            return None
+
+        return array
+
+    def put(self, key: str, array: np.ndarray):
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self._directory)
+
+            try:
+                with os.fdopen(fd, "wb") as fp:
+                    np.save(fp, array)
+                os.replace(tmp, self._path(key))
+            except BaseException:
+                os.remove(tmp)
+                raise
+
+            self._evict()
+        except OSError as e:
+            logging.warning(f"Could not write to cache {self._directory}: {e}")
+
+    def _evict(self):
+        entries = []
+
+        for path in self._directory.glob("*.npy"):
+            try:
+                entries.append((path.stat().st_mtime_ns, path))
+            except OSError:
+                pass
+
+        entries.sort(reverse=True)
+
+        for _, path in entries[self._max_entries :]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
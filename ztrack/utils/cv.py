@@ -1,12 +1,13 @@
+from functools import lru_cache
 from typing import Tuple
 
 import cv2
 import numpy as np
-from decord import VideoReader
 from scipy.interpolate import splev, splprep
 from skimage.draw import circle_perimeter
-from tqdm import tqdm
 
+# re-exported for code that imported it from here before it moved
+from .background import video_median  # noqa: F401
 from .geometry import angle_diff
 from .math import split_int
 
@@ -43,8 +44,58 @@ def gaussian_blur(img: np.ndarray, sigma: float):
         return img.copy()
 
 
-def nearest_contour(contours, point):
-    return max(contours, key=lambda contour: contour_distance(contour, point))
+def rect_distance(rect, point: tuple) -> float:
+    """Upper bound of ``contour_distance`` for a contour in ``rect`` (x, y, w, h)."""
+    x, y, w, h = rect
+    px, py = point
+    x1, y1 = x + w - 1, y + h - 1
+    dx = max(x - px, px - x1, 0)
+    dy = max(y - py, py - y1, 0)
+
+    if dx == 0 and dy == 0:
+        return min(px - x, x1 - px, py - y, y1 - py)
+
+    return -np.hypot(dx, dy)
+
+
+def nearest_contour_index(contours, point, rects=None, hulls=None) -> Tuple[int, float]:
+    """Index and distance of ``nearest_contour(contours, point)``.
+
+    Contours are visited in order of the ``rect_distance`` of their bounding
+    boxes and the search stops once no remaining contour can beat the best one.
+    ``rects`` and ``hulls`` (lists, missing hulls are None) can be passed to
+    reuse bounding boxes and convex hulls between calls; ``hulls`` is filled in.
+    """
+    if len(contours) == 0:
+        raise ValueError("No contours")
+
+    if rects is None:
+        rects = [cv2.boundingRect(contour) for contour in contours]
+
+    if hulls is None:
+        hulls = [None] * len(contours)
+
+    bounds = np.array([rect_distance(rect, point) for rect in rects])
+    best, best_distance = -1, -np.inf
+
+    for i in np.argsort(-bounds, kind="stable"):
+        if bounds[i] + 1e-6 < best_distance:
+            break
+
+        if hulls[i] is None:
+            hulls[i] = cv2.convexHull(contours[i])
+
+        distance = cv2.pointPolygonTest(hulls[i], point, True)
+
+        # ties go to the first contour, as with max()
+        if distance > best_distance or (distance == best_distance and i < best):
+            best, best_distance = i, distance
+
+    return int(best), best_distance
+
+
+def nearest_contour(contours, point, rects=None, hulls=None):
+    return contours[nearest_contour_index(contours, point, rects, hulls)[0]]
 
 
 def fit_ellipse(contour) -> Tuple[float, float, float, float, float]:
@@ -56,24 +107,40 @@ def fit_ellipse(contour) -> Tuple[float, float, float, float, float]:
 
 
 def rgb2gray(img: np.ndarray) -> np.ndarray:
+    if img.ndim == 2:
+        return img
     return cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
 
 
-def video_median(video_path: str, n_frames_for_bg=300, verbose=False) -> np.ndarray:
-    vr = VideoReader(video_path)
-    n_frames = len(vr)
-    n_frames_for_bg = min(n_frames, n_frames_for_bg)
-    idx = np.linspace(0, n_frames - 1, n_frames_for_bg).astype(int)
-    frames = [rgb2gray(vr[i].asnumpy()) for i in (tqdm(idx) if verbose else idx)]
-
-    return np.median(frames, axis=0).astype(np.uint8)
-
-
 def interpolate_tail(tail: np.ndarray, n_points: int) -> np.ndarray:
     tck = splprep(tail.T)[0]
     return np.column_stack(splev(np.linspace(0, 1, n_points), tck))
 
 
+@lru_cache(maxsize=None)
+def tail_step_lengths(length: int, n_steps: int, skips: str) -> Tuple[int, ...]:
+    if skips == "":
+        skips = ()
+    else:
+        skips = np.sort(np.unique(eval(skips)))
+
+    step_lengths = split_int(length, n_steps + len(skips))
+
+    for skip in skips[::-1]:
+        step_lengths[skip - 1] += step_lengths[skip]
+
+    return tuple(np.delete(step_lengths, skips))
+
+
+@lru_cache(maxsize=None)
+def _circle_offsets(radius: int) -> Tuple[np.ndarray, np.ndarray]:
+    # circle_perimeter yields the same offsets, in the same order, for any
+    # center, and clipping to the image only drops some of them
+    offsets = np.column_stack(circle_perimeter(0, 0, radius))
+    angles = np.arctan2(offsets[:, 1], offsets[:, 0])
+    return offsets, angles
+
+
 def sequential_track_tail(
     img,
     point,
@@ -83,44 +150,98 @@ def sequential_track_tail(
     length,
     skips,
 ):
-    h, w = img.shape
+    return sequential_track_tail_batch(img[None], point, angle, theta, n_steps, length, skips)[0]
 
-    if skips == "":
-        skips = ()
-    else:
-        skips = np.sort(np.unique(eval(skips)))
 
-    step_lengths = split_int(round(length), n_steps + len(skips))
+def sequential_track_tail_batch(
+    imgs,
+    point,
+    angle,
+    theta,
+    n_steps,
+    length,
+    skips,
+):
+    """Track the tails in a stack of images of shape (n, h, w) at once.
+
+    Each step searches the pixels on a circle around the previous point, within
+    ``theta`` of the previous direction, for the brightest one. Points of frames
+    whose search ran out of pixels are left at -1.
+    """
+    n, h, w = imgs.shape
+    step_lengths = tail_step_lengths(round(length), n_steps, skips)
+
+    tails = np.full((n, len(step_lengths) + 1, 2), -1, dtype=int)
+    tails[:, 0] = point
+    points = tails[:, 0].copy()
+    angles = np.full(n, angle, dtype=float)
+    active = np.arange(n)
+
+    for i, step_length in enumerate(step_lengths):
+        offsets, offset_angles = _circle_offsets(step_length)
+        candidates = points[active, None] + offsets
+        x, y = candidates[..., 0], candidates[..., 1]
+        valid = (x >= 0) & (x < w) & (y >= 0) & (y < h)
+        valid &= angle_diff(offset_angles, angles[active, None]) < theta
+        values = imgs[active[:, None], y.clip(0, h - 1), x.clip(0, w - 1)]
+        # the first brightest valid pixel, as in the order of circle_perimeter
+        argmax = np.where(valid, values.astype(float), -np.inf).argmax(axis=1)
+        found = valid.any(axis=1)
+        active, argmax = active[found], argmax[found]
+
+        if len(active) == 0:
+            break
+
+        points[active] = candidates[found, argmax]
+        angles[active] = offset_angles[argmax]
+        tails[active, i + 1] = points[active]
 
-    for skip in skips[::-1]:
-        step_lengths[skip - 1] += step_lengths[skip]
+    return tails
 
-    step_lengths = np.delete(step_lengths, skips)
-    n_steps = len(step_lengths)
 
-    tail = np.full((n_steps + 1, 2), -1, dtype=int)
-    tail[0] = point
+def _cos_range(a: float, b: float) -> Tuple[float, float]:
+    # range of cos(x) for x in [a, b]
+    if b - a >= 2 * np.pi:
+        return -1.0, 1.0
 
-    for i in range(n_steps):
-        points = np.column_stack(circle_perimeter(*point, step_lengths[i], shape=(w, h)))
-        angles = np.arctan2(*reversed((points - point).T))
-        lim = theta
-        idx = angle_diff(angles, angle) < lim
-        points, angles = points[idx], angles[idx]
+    ends = np.cos(a), np.cos(b)
+    lo = (
+        -1.0
+        if np.ceil((a - np.pi) / (2 * np.pi)) <= np.floor((b - np.pi) / (2 * np.pi))
+        else min(ends)
+    )
+    hi = 1.0 if np.ceil(a / (2 * np.pi)) <= np.floor(b / (2 * np.pi)) else max(ends)
+    return lo, hi
 
-        if len(points) == 0:
-            break
 
-        x, y = points.T
-        argmax = img[y, x].argmax()
-        angle = angles[argmax]
-        tail[i + 1] = point = points[argmax]
+def sequential_tail_bbox(point, angle, theta, n_steps, length, skips):
+    """Bounds (x_min, y_min, x_max, y_max) of the pixels sequential_track_tail may look at.
+
+    Step k goes in a direction within k * theta of ``angle``; the extremes of
+    each step are added up independently, so the bounds are conservative.
+    """
+    x, y = point
+    bounds = np.array([x, y, x, y], dtype=float)
+    lo = np.zeros(2)
+    hi = np.zeros(2)
+
+    for k, r in enumerate(tail_step_lengths(round(length), n_steps, skips), 1):
+        a, b = angle - k * theta, angle + k * theta
+
+        for axis, phase in enumerate((0, np.pi / 2)):
+            cos_min, cos_max = _cos_range(a - phase, b - phase)
+            # perimeter pixels are within a pixel of the circle
+            lo[axis] += r * cos_min - 1
+            hi[axis] += r * cos_max + 1
+
+        bounds[:2] = np.minimum(bounds[:2], (x + lo[0], y + lo[1]))
+        bounds[2:] = np.maximum(bounds[2:], (x + hi[0], y + hi[1]))
 
-    return tail
+    return tuple(bounds)
 
 
 def rgb2gray_dark_bg_blur(img, sigma=0, invert=0):
-    img = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    img = rgb2gray(img)
 
     if invert:
         img = cv2.bitwise_not(img)
@@ -1,13 +1,52 @@
+import hashlib
 import json
+import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, List, NamedTuple, Optional, Tuple
 
-from ztrack._settings import config_extension, results_extension, video_extensions
+from ztrack._settings import (
+    columnar_results_extension,
+    config_extension,
+    events_extension,
+    results_extension,
+    video_extensions,
+)
 
 
-def get_results_path(video):
-    if Path(str(video) + results_extension).exists():
-        return Path(str(video) + results_extension)
+def video_fingerprint(video, chunk_size=1 << 16) -> str:
+    # cheap content identity: size, mtime and a hash of the start, middle and end
+    stat = os.stat(video)
+    h = hashlib.blake2b(f"{stat.st_size}:{stat.st_mtime_ns}".encode(), digest_size=16)
+
+    with open(video, "rb") as fp:
+        for offset in (0, stat.st_size // 2, max(0, stat.st_size - chunk_size)):
+            fp.seek(offset)
+            h.update(fp.read(chunk_size))
+
+    return h.hexdigest()
+
+
+def get_results_path(video, extension=None):
+    """Path of the results of ``video``.
+
+    Without ``extension``, the newest existing results of any format are
+    preferred, falling back to the default HDF5 path.
+    """
+    if extension is not None:
+        if Path(str(video) + extension).exists():
+            return Path(str(video) + extension)
+        return Path(video).with_suffix(extension)
+
+    paths = [
+        path
+        for ext in (results_extension, columnar_results_extension)
+        for path in (Path(str(video) + ext), Path(video).with_suffix(ext))
+        if path.exists()
+    ]
+
+    if paths:
+        return max(paths, key=lambda path: path.stat().st_mtime)
+
     return Path(video).with_suffix(results_extension)
 
 
@@ -17,6 +56,13 @@ def get_config_path(video):
     return Path(str(video)).with_suffix(config_extension)
 
 
+def get_events_path(video):
+    # events saved by the annotator
+    if Path(str(video) + events_extension).exists():
+        return Path(str(video) + events_extension)
+    return Path(str(video)).with_suffix(events_extension)
+
+
 def get_config_dict(video) -> Optional[dict]:
     path = get_config_path(video)
 
@@ -29,21 +75,115 @@ def get_config_dict(video) -> Optional[dict]:
     return None
 
 
-def get_video_paths(inputs, recursive):
+class VideoFiles(NamedTuple):
+    video: Path
+    config: Optional[Path]
+    results: Optional[Path]
+
+
+def config_hash(config: dict) -> str:
+    data = json.dumps(config, sort_keys=True)
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def results_stamp(group_config: dict, fingerprint: str) -> str:
+    """Identity of the results of a tracker group: its config, the ztrack version and the video.
+
+    Results with the stamp of the current config and video do not need to be tracked again.
+    """
+    from ztrack import __version__
+
+    config = {key: group_config[key] for key in ("method", "roi", "params")}
+    data = json.dumps([config, __version__, fingerprint], sort_keys=True)
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def list_directory(directory) -> Tuple[List[str], List[str]]:
+    """Names of the subdirectories and of the files in ``directory``."""
+    subdirs: List[str] = []
+    files: List[str] = []
+
+    # the file types come with the listing, no stat calls needed
+    with os.scandir(directory) as it:
+        for entry in it:
+            (subdirs if entry.is_dir() else files).append(entry.name)
+
+    return sorted(subdirs), sorted(files)
+
+
+def match_video_files(directory, names: Iterable[str]) -> List[VideoFiles]:
+    """The videos among ``names`` (files in ``directory``) with their configs and results."""
+    directory = Path(directory)
+    names = set(names)
+    files = []
+
+    for name in sorted(names):
+        stem, ext = os.path.splitext(name)
+
+        if ext not in video_extensions:
+            continue
+
+        def sibling(ext):
+            for candidate in (name + ext, stem + ext):
+                if candidate in names:
+                    return directory / candidate
+            return None
+
+        video = directory / name
+        results = sibling(results_extension)
+        columnar_results = sibling(columnar_results_extension)
+
+        if results is not None and columnar_results is not None:
+            # both formats, the newest one is used
+            results = get_results_path(video)
+
+        files.append(VideoFiles(video, sibling(config_extension), results or columnar_results))
+
+    return files
+
+
+def scan_directory(directory, recursive, index=None) -> List[VideoFiles]:
+    """Videos in ``directory`` from directory listings (cached by ``index`` if given)."""
+    listing = list_directory if index is None else index.list_directory
+    files: List[VideoFiles] = []
+    stack = [Path(directory)]
+
+    while stack:
+        directory = stack.pop()
+        subdirs, names = listing(directory)
+        files.extend(match_video_files(directory, names))
+
+        if recursive:
+            stack.extend(directory / name for name in reversed(subdirs))
+
+    return files
+
+
+def get_video_files(inputs, recursive, index=None) -> List[VideoFiles]:
     paths: List[Path] = list(map(Path, inputs))
-    videos = [path for path in paths if path.is_file() and path.suffix in video_extensions]
+    files = [
+        VideoFiles(
+            path,
+            get_config_path(path) if get_config_path(path).exists() else None,
+            get_results_path(path) if get_results_path(path).exists() else None,
+        )
+        for path in paths
+        if path.is_file() and path.suffix in video_extensions
+    ]
 
     for path in filter(Path.is_dir, paths):
-        for ext in video_extensions:
-            videos.extend(path.rglob(f"*{ext}") if recursive else path.glob(f"*{ext}"))
+        files.extend(scan_directory(path, recursive, index))
+
+    return files
+
 
-    return videos
+def get_video_paths(inputs, recursive, index=None):
+    return [files.video for files in get_video_files(inputs, recursive, index)]
 
 
-def get_paths_for_view_results(inputs: List[str], recursive: bool):
-    videos = get_video_paths(inputs, recursive)
-    videos = [file for file in videos if get_results_path(file).exists()]
-    return videos
+def get_paths_for_view_results(inputs: List[str], recursive: bool, index=None):
+    files = get_video_files(inputs, recursive, index)
+    return [file.video for file in files if file.results is not None]
 
 
 def get_paths_for_config_creation(
@@ -90,11 +230,11 @@ def get_paths_for_config_creation(
     return video_paths, save_paths
 
 
-def get_video_paths_from_inputs(inputs: List[str], recursive: bool, overwrite: bool):
-    videos = get_video_paths(inputs, recursive)
-    videos = [file for file in videos if get_config_path(file).exists()]
+def get_video_paths_from_inputs(inputs: List[str], recursive: bool, overwrite: bool, index=None):
+    files = get_video_files(inputs, recursive, index)
+    files = [file for file in files if file.config is not None]
 
     if not overwrite:
-        videos = [file for file in videos if not get_results_path(file).exists()]
+        files = [file for file in files if file.results is None]
 
-    return videos
+    return [file.video for file in files]
@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from ztrack._settings import index_env
+
+from .cache import get_cache_dir
+from .file import list_directory, match_video_files
+
+_schema = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    subdirs TEXT NOT NULL,
+    files TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS videos (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    config_path TEXT,
+    results_path TEXT,
+    config_hash TEXT,
+    trackers TEXT,
+    stamps TEXT,
+    n_frames INTEGER,
+    status TEXT NOT NULL,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS videos_directory ON videos (directory);
+"""
+
+# listings of directories modified less than this long ago are not cached,
+# since a change in the same mtime tick would go unnoticed
+_racy_ns = 2_000_000_000
+
+
+def get_index_path() -> Path:
+    if os.environ.get(index_env):
+        return Path(os.environ[index_env])
+    return get_cache_dir() / "index.sqlite"
+
+
+def _key(path) -> str:
+    return Path(path).absolute().as_posix()
+
+
+class ExperimentIndex:
+    """A SQLite index of the videos, configs and results of experiments.
+
+    The listing of every scanned directory is stored with the directory's
+    mtime, which changes whenever files are added, removed or renamed in it
+    (e.g. when results are swapped in), so a scan only stats directories and
+    only lists the ones that changed. Every video found gets a row with its
+    config and results paths and a status (``new``, ``configured``, ``done``,
+    ``running`` or ``failed``), and ``record`` keeps the rest of the row
+    (config hash, trackers, results stamps, number of frames, error,
+    timestamps) up to date as videos are tracked.
+    """
+
+    def __init__(self, path=None):
+        path = Path(get_index_path() if path is None else path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(path), timeout=30)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.executescript(_schema)
+
+        # indexes created before results were stamped
+        columns = [row["name"] for row in self._connection.execute("PRAGMA table_info(videos)")]
+
+        if "stamps" not in columns:
+            self._connection.execute("ALTER TABLE videos ADD COLUMN stamps TEXT")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def list_directory(self, directory) -> Tuple[List[str], List[str]]:
+        """Like ``ztrack.utils.file.list_directory``, from the index if the directory is unchanged."""
+        key = _key(directory)
+        mtime_ns = os.stat(directory).st_mtime_ns
+        row = self._connection.execute(
+            "SELECT * FROM directories WHERE path = ?", (key,)
+        ).fetchone()
+
+        if row is not None and row["mtime_ns"] == mtime_ns:
+            return json.loads(row["subdirs"]), json.loads(row["files"])
+
+        subdirs, files = list_directory(directory)
+
+        with self._connection:
+            if time.time_ns() - mtime_ns > _racy_ns:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?)",
+                    (key, mtime_ns, json.dumps(subdirs), json.dumps(files)),
+                )
+
+            self._update_directory(directory, files)
+
+        return subdirs, files
+
+    def record(self, video, **fields):
+        """Update the row of ``video`` with ``fields`` (columns of the videos table)."""
+        if "trackers" in fields and fields["trackers"] is not None:
+            fields["trackers"] = json.dumps(list(fields["trackers"]))
+
+        if "stamps" in fields and fields["stamps"] is not None:
+            fields["stamps"] = json.dumps(fields["stamps"], sort_keys=True)
+
+        for name in ("config_path", "results_path"):
+            if fields.get(name) is not None:
+                fields[name] = _key(fields[name])
+
+        now = time.time()
+        key = _key(video)
+
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO videos (path, directory, status, created, updated) "
+                "VALUES (?, ?, 'new', ?, ?)",
+                (key, _key(Path(video).parent), now, now),
+            )
+
+            if fields:
+                columns = ", ".join(f"{name} = ?" for name in fields)
+                self._connection.execute(
+                    f"UPDATE videos SET {columns}, updated = ? WHERE path = ?",
+                    (*fields.values(), now, key),
+                )
+
+    def get(self, video) -> Optional[dict]:
+        row = self._connection.execute(
+            "SELECT * FROM videos WHERE path = ?", (_key(video),)
+        ).fetchone()
+        return None if row is None else self._to_dict(row)
+
+    def query(self, directory=None, recursive=True) -> pd.DataFrame:
+        """The rows of the videos in ``directory`` (all videos if ``None``)."""
+        if directory is None:
+            rows = self._connection.execute("SELECT * FROM videos ORDER BY path")
+        elif recursive:
+            key = _key(directory)
+            rows = self._connection.execute(
+                "SELECT * FROM videos WHERE directory = ? OR directory LIKE ? ESCAPE '\\' "
+                "ORDER BY path",
+                (key, _escape_like(key.rstrip("/")) + "/%"),
+            )
+        else:
+            rows = self._connection.execute(
+                "SELECT * FROM videos WHERE directory = ? ORDER BY path", (_key(directory),)
+            )
+
+        return pd.DataFrame([self._to_dict(row) for row in rows])
+
+    def _update_directory(self, directory, files: List[str]):
+        now = time.time()
+        directory_key = _key(directory)
+        found = match_video_files(directory, files)
+
+        for file in found:
+            status = "done" if file.results is not None else "configured" if file.config else "new"
+            values = (
+                _key(file.config) if file.config else None,
+                _key(file.results) if file.results else None,
+            )
+            self._connection.execute(
+                "INSERT INTO videos (path, directory, config_path, results_path, status, "
+                "created, updated) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET "
+                "config_path = excluded.config_path, results_path = excluded.results_path, "
+                # the status of a video being tracked or that failed is kept
+                "status = CASE WHEN status IN ('running', 'failed') THEN status "
+                "ELSE excluded.status END, "
+                "updated = excluded.updated "
+                "WHERE config_path IS NOT excluded.config_path "
+                "OR results_path IS NOT excluded.results_path",
+                (_key(file.video), directory_key, *values, status, now, now),
+            )
+
+        # videos that are gone, deleted one by one as a directory can hold more videos than
+        # SQLite accepts variables in a statement
+        paths = {_key(file.video) for file in found}
+        rows = self._connection.execute(
+            "SELECT path FROM videos WHERE directory = ?", (directory_key,)
+        ).fetchall()
+        self._connection.executemany(
+            "DELETE FROM videos WHERE path = ?",
+            [(row["path"],) for row in rows if row["path"] not in paths],
+        )
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        d = dict(row)
+
+        for name in ("trackers", "stamps"):
+            if d[name] is not None:
+                d[name] = json.loads(d[name])
+
+        return d
+
+
+def _escape_like(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def open_index(path=None) -> Optional[ExperimentIndex]:
+    """Open the experiment index, or return ``None`` (with a warning) if it cannot be used."""
+    try:
+        return ExperimentIndex(path)
+    except (OSError, sqlite3.Error) as e:
+        logging.warning(f"Not using the experiment index: {e!r}")
+        return None
@@ -0,0 +1,355 @@
+"""Render tracking results onto the frames of a video.
+
+Results are converted to plain arrays indexed by frame (``Overlays``) before
+rendering starts. Frames are then decoded in a background thread, drawn on by
+a pool of worker threads and encoded in order, with bounded queues between
+the stages so that all three overlap.
+"""
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from ztrack._settings import decode_batch_size
+from ztrack.results import ResultsReader
+
+from .cv import warp_img
+from .video import FrameSource
+
+colors = dict(
+    left_eye=(0, 0, 255),
+    right_eye=(255, 0, 0),
+    swim_bladder=(0, 255, 0),
+    tail=(255, 0, 255),
+)
+blobs = ("left_eye", "right_eye", "swim_bladder")
+
+
+class Overlays:
+    """Eye ellipses (n, 3, 5), headings (n,) and tail points (n, n_points, 2)."""
+
+    def __init__(self, ellipses=None, heading=None, tail=None):
+        self.ellipses: Optional[np.ndarray] = ellipses
+        self.heading: Optional[np.ndarray] = heading
+        self.tail: Optional[np.ndarray] = tail
+
+    @classmethod
+    def from_dataframes(cls, df_eye: pd.DataFrame = None, df_tail: pd.DataFrame = None):
+        ellipses = heading = tail = None
+
+        if df_eye is not None:
+            columns = pd.MultiIndex.from_product((blobs, ("cx", "cy", "a", "b", "theta")))
+            ellipses = df_eye[columns].to_numpy(dtype=float).reshape(len(df_eye), 3, 5)
+            heading = df_eye["heading"].to_numpy(dtype=float).reshape(len(df_eye))
+
+        if df_tail is not None:
+            tail = df_tail.to_numpy(dtype=float).reshape(len(df_tail), -1, 2)
+
+        return cls(ellipses, heading, tail)
+
+    @classmethod
+    def from_store(cls, store: ResultsReader):
+        df_eye = None
+        df_tail = None
+
+        if "free" in store:
+            try:
+                df = store["free"]
+                df_eye = df[["left_eye", "right_eye", "swim_bladder", "heading"]]
+                tail_columns = [j for j in df.columns if "point" in j[0]]
+                df_tail = df.loc[:, tail_columns]
+            except KeyError:
+                pass
+
+        if df_eye is None and "eye" in store:
+            df_eye = store["eye"]
+        if df_tail is None and "tail" in store:
+            df_tail = store["tail"]
+
+        return cls.from_dataframes(df_eye, df_tail)
+
+    @property
+    def midpoints(self) -> Optional[np.ndarray]:
+        if self.ellipses is None:
+            return None
+        return (self.ellipses[:, 0, :2] + self.ellipses[:, 1, :2]) / 2
+
+
+def draw_frame(
+    img: np.ndarray,
+    i: int,
+    overlays: Overlays,
+    *,
+    fps: float,
+    line_width=2,
+    label=True,
+    timer=False,
+    egocentric=False,
+    width=200,
+    front=80,
+    behind=120,
+    line_type=cv2.LINE_AA,
+) -> np.ndarray:
+    """Draw the results of frame ``i`` on ``img`` (in place, unless egocentric)."""
+    if label and overlays.ellipses is not None:
+        for blob, (cx, cy, a, b, angle) in zip(blobs, overlays.ellipses[i]):
+            if np.isfinite((cx, cy, a, b, angle)).all():
+                center = (round(cx), round(cy))
+                axes = (round(a), round(b))
+                cv2.ellipse(img, center, axes, angle, 0, 360, colors[blob], line_width, line_type)
+
+    if label and overlays.tail is not None:
+        tail = overlays.tail[i]
+        tail = tail[np.isfinite(tail).all(axis=1)]
+
+        if len(tail) > 0:
+            pts = np.round(tail[:, None, :]).astype(int)
+            cv2.polylines(img, [pts], False, colors["tail"], line_width, line_type)
+
+    if egocentric and overlays.ellipses is not None:
+        img = warp_img(img, overlays.midpoints[i], overlays.heading[i], width, front, behind)
+
+    if timer:
+        t = i / fps
+        text = f"{t:.2f} s"
+        img = cv2.putText(
+            img,
+            text,
+            (64, 64),
+            cv2.FONT_HERSHEY_DUPLEX,
+            1,
+            (255, 255, 255),
+            2,
+            cv2.LINE_AA,
+            False,
+        )
+
+    return img
+
+
+def to_windows(indices: Iterable[int]) -> List[Tuple[int, int]]:
+    """Split frame indices into runs of consecutive frames ``[start, stop)``."""
+    if isinstance(indices, range) and indices.step == 1:
+        return [(indices.start, indices.stop)] if len(indices) > 0 else []
+
+    windows: List[Tuple[int, int]] = []
+
+    for i in indices:
+        if windows and windows[-1][1] == i:
+            windows[-1] = (windows[-1][0], i + 1)
+        else:
+            windows.append((i, i + 1))
+
+    return windows
+
+
+def merge_windows(windows: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sort windows and merge the ones that overlap or touch."""
+    merged: List[Tuple[int, int]] = []
+
+    for start, stop in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+
+    return merged
+
+
+def event_windows(frames: Iterable[int], before: int, after: int) -> List[Tuple[int, int]]:
+    """Windows from ``before`` frames before to ``after`` frames after each event frame."""
+    return [(max(0, int(i) - before), int(i) + after + 1) for i in frames]
+
+
+def read_events(csv_path) -> pd.DataFrame:
+    """Read the events (``frame``, ``type``) saved by the annotator, sorted by frame."""
+    return pd.read_csv(csv_path).sort_values("frame", kind="stable")
+
+
+def clip_path(save_path, window: Tuple[int, int]) -> str:
+    """``video.avi.mp4`` -> ``video.avi.100-200.mp4`` for the window ``(100, 200)``."""
+    path = Path(save_path)
+    return str(path.with_name(f"{path.stem}.{window[0]}-{window[1]}{path.suffix}"))
+
+
+def _decode(video_path, windows, batch_size, out: queue.Queue, stop: threading.Event):
+    try:
+        # one reader for every window, each one is seeked to directly
+        source = FrameSource(video_path, batch_size=batch_size)
+
+        for k, (start, end) in enumerate(windows):
+            for i, frames in source.batches(start, end):
+                if stop.is_set():
+                    return
+
+                # the source reuses its buffer, and the frames are drawn on
+                out.put((k, i, frames.copy()))
+    except BaseException as e:
+        out.put(e)
+    else:
+        out.put(None)
+
+
+def _draw_batch(draw, k, i, frames):
+    return k, [draw(frame, i + j) for j, frame in enumerate(frames)]
+
+
+def render(
+    video_path,
+    windows: List[Tuple[int, int]],
+    draw,
+    write,
+    *,
+    jobs=4,
+    batch_size=decode_batch_size,
+    queue_size=8,
+    verbose=False,
+):
+    """Decode the frames in ``windows`` and ``draw(frame, i)`` on them.
+
+    Drawn frames are passed on in order with ``write(k, imgs)``, where ``k`` is
+    the index of the window they belong to.
+    """
+    decoded: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    decoder = threading.Thread(
+        target=_decode, args=(video_path, windows, batch_size, decoded, stop), daemon=True
+    )
+    progress = tqdm(total=sum(end - start for start, end in windows)) if verbose else None
+    pending: deque = deque()
+
+    def write_next():
+        k, imgs = pending.popleft().result()
+        write(k, imgs)
+
+        if progress is not None:
+            progress.update(len(imgs))
+
+    decoder.start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            while True:
+                item = decoded.get()
+
+                if item is None:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+
+                pending.append(executor.submit(_draw_batch, draw, *item))
+
+                # bound the number of drawn batches waiting to be encoded
+                while len(pending) > queue_size:
+                    write_next()
+
+            while pending:
+                write_next()
+    finally:
+        stop.set()
+
+        # unblock the decoder if it is waiting for room in the queue
+        while decoder.is_alive():
+            try:
+                decoded.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+        if progress is not None:
+            progress.close()
+
+
+def render_video(
+    video_path,
+    save_path,
+    overlays: Overlays,
+    *,
+    codec: str,
+    fps=None,
+    frame_range=None,
+    windows: Optional[List[Tuple[int, int]]] = None,
+    clips=False,
+    jobs=4,
+    batch_size=decode_batch_size,
+    verbose=False,
+    **options,
+):
+    """Render ``overlays`` onto the frames of a video.
+
+    Only the frames in ``windows`` (``[start, stop)`` pairs) are decoded, or in
+    ``frame_range`` if there are none, and all frames if neither is given. The
+    windows are concatenated into ``save_path``, or with ``clips=True`` each is
+    saved to its own ``clip_path(save_path, window)``. ``options`` are passed
+    on to ``draw_frame``.
+    """
+    cap = cv2.VideoCapture(str(video_path))
+    n_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    if fps is None:
+        fps = int(cap.get(cv2.CAP_PROP_FPS))
+
+    if overlays.ellipses is None:
+        options["egocentric"] = False
+
+    if options.get("egocentric"):
+        w = options.get("width", 200)
+        h = options.get("front", 80) + options.get("behind", 120)
+    else:
+        w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    cap.release()
+
+    if windows is None:
+        if frame_range is None:
+            frame_range = range(0, n_frames)
+        elif isinstance(frame_range, tuple):
+            frame_range = range(*frame_range)
+
+        windows = to_windows(frame_range)
+
+    windows = [(max(0, start), min(stop, n_frames)) for start, stop in windows]
+    windows = [window for window in windows if window[0] < window[1]]
+
+    def open_writer(path):
+        return cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*codec), fps, (w, h), True)
+
+    writers = {} if clips else {0: open_writer(save_path)}
+
+    def write(k, imgs):
+        key = k if clips else 0
+
+        if key not in writers:
+            # windows are written in order, so the previous clip is complete
+            for writer in writers.values():
+                writer.release()
+
+            writers.clear()
+            writers[key] = open_writer(clip_path(save_path, windows[k]) if clips else save_path)
+
+        for img in imgs:
+            writers[key].write(img)
+
+    draw = partial(draw_frame, overlays=overlays, fps=fps, **options)
+
+    try:
+        render(
+            video_path,
+            windows,
+            draw,
+            write,
+            jobs=jobs,
+            batch_size=batch_size,
+            verbose=verbose,
+        )
+    finally:
+        for writer in writers.values():
+            writer.release()
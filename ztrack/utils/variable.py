@@ -71,6 +71,28 @@ class String(Variable):
         self._value = value
 
 
+class Choice(Variable):
+    def __init__(self, display_name: str, value: str, choices: Tuple[str, ...]):
+        super().__init__(display_name)
+        self._choices = tuple(choices)
+        self._value = self._choices[0]
+        self.value = value
+
+    @property
+    def value(self) -> str:
+        return self._value
+
+    @value.setter
+    def value(self, value: str):
+        if value not in self._choices:
+            raise ValueError(f"{value!r} is not one of {self._choices}")
+        self._value = value
+
+    @property
+    def choices(self):
+        return self._choices
+
+
 class FloatRange(Variable):
     def __init__(self, display_name: str, value, minimum=0.0, maximum=1.0):
         super().__init__(display_name)
@@ -0,0 +1,125 @@
+import ctypes
+from typing import Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+from decord import VideoReader
+
+try:
+    from decord._ffi.base import _LIB, check_call
+except ImportError:  # pragma: no cover
+    _LIB = None
+
+
+def _asnumpy(array, out: Optional[np.ndarray] = None) -> np.ndarray:
+    # Copy a decord NDArray into `out` instead of allocating a new array for every batch.
+    shape = tuple(array.shape)
+
+    if _LIB is None or out is None or out.shape != shape or out.dtype != np.uint8:
+        return array.asnumpy()
+
+    data = out.ctypes.data_as(ctypes.c_void_p)
+    check_call(_LIB.DECORDArrayCopyToBytes(array.handle, data, ctypes.c_size_t(out.nbytes)))
+    return out
+
+
+class FrameSource:
+    """Sequentially decode the frames ``[start, stop)`` of a video in batches.
+
+    Consecutive frames are requested from decord with ``get_batch`` so the decoder
+    never has to seek inside the range, and every batch is copied into the same
+    output buffer. Batches are only valid until the next one is decoded.
+
+    With ``gray=True`` the frames are cropped to ``roi`` (x, y, w, h) and
+    converted to single-channel luma as they come out of the decoder, so that
+    callers never touch the full RGB frames.
+    """
+
+    def __init__(self, video_path, *, batch_size=16, start=0, stop=None, gray=False, roi=None):
+        self._video_reader = VideoReader(str(video_path))
+        self._gray = gray
+        self._roi = roi
+        n_frames = len(self._video_reader)
+        self._batch_size = max(1, int(batch_size))
+        self._start = min(max(0, start), n_frames)
+        self._stop = n_frames if stop is None else min(max(self._start, stop), n_frames)
+        self._buffer: Optional[np.ndarray] = None
+        self._gray_buffer: Optional[np.ndarray] = None
+
+    def __len__(self):
+        return self._stop - self._start
+
+    @property
+    def start(self):
+        return self._start
+
+    @property
+    def stop(self):
+        return self._stop
+
+    @property
+    def n_frames(self):
+        return len(self._video_reader)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(self._video_reader[0].shape)
+
+    @property
+    def fps(self):
+        return self._video_reader.get_avg_fps()
+
+    def batches(self, start=None, stop=None) -> Iterator[Tuple[int, np.ndarray]]:
+        """Decode ``[start, stop)`` (default the range of the source), seeking to ``start``."""
+        start = self._start if start is None else min(max(0, start), self.n_frames)
+        stop = self._stop if stop is None else min(max(start, stop), self.n_frames)
+
+        for i in range(start, stop, self._batch_size):
+            j = min(i + self._batch_size, stop)
+            yield i, self._decode(range(i, j))
+
+    def frames_at(self, indices) -> Iterator[Tuple[int, np.ndarray]]:
+        """Decode the frames at ``indices`` (ascending), ``batch_size`` at a time."""
+        indices = list(indices)
+
+        for k in range(0, len(indices), self._batch_size):
+            batch = indices[k : k + self._batch_size]
+            yield from zip(batch, self._decode(batch))
+
+    def _decode(self, indices) -> np.ndarray:
+        batch = self._video_reader.get_batch(indices)
+        n = len(indices)
+
+        if self._buffer is None or len(self._buffer) < n:
+            self._buffer = np.empty(tuple(batch.shape), dtype=np.uint8)
+
+        frames = _asnumpy(batch, self._buffer[:n])
+
+        if self._gray:
+            frames = self._to_gray(frames)
+
+        return frames
+
+    def _to_gray(self, frames: np.ndarray) -> np.ndarray:
+        if self._roi is not None:
+            x, y, w, h = self._roi
+            frames = frames[:, y : y + h, x : x + w]
+
+        shape = frames.shape[:3]
+
+        buffer = self._gray_buffer
+
+        if buffer is None or buffer.shape[1:] != shape[1:] or len(buffer) < shape[0]:
+            self._gray_buffer = np.empty(shape, dtype=np.uint8)
+
+        gray = self._gray_buffer[: shape[0]]
+
+        for frame, out in zip(frames, gray):
+            cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY, dst=out)
+
+        return gray
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        for i, batch in self.batches():
+            for j, frame in enumerate(batch):
+                yield i + j, frame